@@ -0,0 +1,111 @@
+from langchain.agents import AgentExecutor
+from langchain.agents.agent import MultiActionAgentOutputParser
+from langchain.agents.format_scratchpad import format_log_to_str
+from langchain.agents.output_parsers import ReActSingleInputOutputParser
+from langchain.tools.render import render_text_description
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.exceptions import OutputParserException
+from langchain_core.runnables import Runnable, RunnablePassthrough
+from typing import Dict, List, Any, Optional, Sequence, Union
+import asyncio
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Start of each "Action:" line (not "Action Input:") in a ReAct completion
+_ACTION_LINE = re.compile(r"^[ \t]*Action\s*\d*\s*:", re.MULTILINE)
+
+_single_parser = ReActSingleInputOutputParser()
+
+class MultiActionReActParser(MultiActionAgentOutputParser):
+    """ReAct parser that accepts several Action/Action Input pairs in one turn
+
+    Each pair becomes its own AgentAction so the executor can run them together.
+    A single pair or a final answer parses exactly like the stock ReAct parser.
+    """
+
+    def parse(self, text: str) -> Union[List[AgentAction], AgentFinish]:
+        starts = [match.start() for match in _ACTION_LINE.finditer(text)]
+        if len(starts) <= 1:
+            output = _single_parser.parse(text)
+            return output if isinstance(output, AgentFinish) else [output]
+
+        if "Final Answer:" in text:
+            raise OutputParserException(
+                f"Parsing LLM output produced both a final answer and parse-able actions: {text}"
+            )
+
+        # The leading thought stays with the first action so the scratchpad reads back in order
+        bounds = [0] + starts[1:] + [len(text)]
+        return [_single_parser.parse(text[start:end].rstrip()) for start, end in zip(bounds, bounds[1:])]
+
+    @property
+    def _type(self) -> str:
+        return "react-multi-input"
+
+def create_parallel_react_agent(llm: Any, tools: Sequence[Any], prompt: Any) -> Runnable:
+    """Same runnable as langchain's create_react_agent, but one turn may call several tools"""
+    prompt = prompt.partial(
+        tools=render_text_description(list(tools)),
+        tool_names=", ".join([tool.name for tool in tools])
+    )
+    return (
+        RunnablePassthrough.assign(
+            agent_scratchpad=lambda x: format_log_to_str(x["intermediate_steps"])
+        )
+        | prompt
+        | llm.bind(stop=["\nObservation"])
+        | MultiActionReActParser()
+    )
+
+class _LimitedTool:
+    """Runs a tool while holding a slot of a semaphore shared by one agent step"""
+
+    def __init__(self, tool: Any, semaphore: asyncio.Semaphore):
+        self.tool = tool
+        self.semaphore = semaphore
+        self.return_direct = tool.return_direct
+
+    async def arun(self, *args, **kwargs):
+        async with self.semaphore:
+            try:
+                return await self.tool.arun(*args, **kwargs)
+            except Exception as e:
+                # Report the failure as this call's observation instead of failing
+                # the other tools gathered in the same step
+                logger.error(f"Error running tool {self.tool.name}: {str(e)}")
+                return {"success": False, "tool": self.tool.name, "error": str(e)}
+
+class ParallelAgentExecutor(AgentExecutor):
+    """AgentExecutor that runs the independent actions of one step concurrently
+
+    LangChain already gathers all actions the agent emits in a step; this caps how
+    many tool calls may be in flight at once. A limit of 1 keeps the previous
+    one-at-a-time behaviour.
+    """
+
+    max_concurrent_tools: int = 1
+
+    async def _aiter_next_step(
+        self,
+        name_to_tool_map: Dict[str, Any],
+        color_mapping: Dict[str, str],
+        inputs: Dict[str, str],
+        intermediate_steps: List,
+        run_manager: Optional[Any] = None,
+    ):
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrent_tools))
+        limited_tools = {
+            name: _LimitedTool(tool, semaphore)
+            for name, tool in name_to_tool_map.items()
+        }
+
+        async for step in super()._aiter_next_step(
+            limited_tools,
+            color_mapping,
+            inputs,
+            intermediate_steps,
+            run_manager
+        ):
+            yield step
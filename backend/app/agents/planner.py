@@ -1,13 +1,15 @@
-from langchain.agents import create_react_agent, AgentExecutor
 from langchain.prompts import PromptTemplate
-from langchain.memory import ConversationBufferMemory
-from langchain.schema import BaseMessage, HumanMessage, AIMessage
-from typing import Dict, List, Any, Optional
+from langchain.memory import ConversationBufferWindowMemory
+from langchain_community.chat_message_histories import RedisChatMessageHistory
+from typing import AsyncIterator, Dict, List, Any, Optional
 import logging
 import asyncio
+import orjson
 from datetime import datetime
+from cachetools import TTLCache
 
 from app.llm.factory import create_llm
+from app.agents.executor import ParallelAgentExecutor, create_parallel_react_agent
 from app.agents.tools.rag_tool import RAGTool
 from app.agents.tools.sql_tool import SQLTool
 from app.agents.tools.web_tool import WebTool
@@ -15,6 +17,12 @@ from app.config import config
 
 logger = logging.getLogger(__name__)
 
+# ReAct output after this marker is the answer shown to the user
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+# When several tools are used, the query type is the earliest of these in the tuple
+QUERY_TYPE_PRIORITY = ("rag_search", "sql_analytics", "web_search")
+
 class QueryPlanner:
     """Main query planner using ReAct agent to route queries to appropriate tools"""
     
@@ -23,11 +31,14 @@ class QueryPlanner:
         self.tools = []
         self.agent = None
         self.agent_executor = None
-        self.memory = ConversationBufferMemory(
+        self.memory = ConversationBufferWindowMemory(
+            k=config.MEMORY_WINDOW_EXCHANGES,
             memory_key="chat_history",
-            return_messages=True
+            return_messages=False
         )
-        self.sessions = {}
+        # Bounded by count and idle time so long-running processes don't grow forever
+        self.sessions = TTLCache(maxsize=config.SESSION_CACHE_SIZE, ttl=config.SESSION_TTL)
+        self.redis = None
         
     async def initialize(self):
         """Initialize the query planner with LLM and tools"""
@@ -35,6 +46,12 @@ class QueryPlanner:
             # Initialize LLM
             self.llm = create_llm()
             
+            # Keep session state in Redis so every worker process sees it
+            if config.REDIS_URL:
+                import redis.asyncio as aioredis
+                self.redis = aioredis.from_url(config.REDIS_URL, decode_responses=True)
+                logger.info("Using Redis for session storage")
+            
             # Initialize tools
             await self._initialize_tools()
             
@@ -47,20 +64,27 @@ class QueryPlanner:
             logger.error(f"Error initializing query planner: {str(e)}")
             raise
     
+    async def close(self):
+        """Release tool resources before shutdown"""
+        for tool in self.tools:
+            if hasattr(tool, 'close'):
+                await tool.close()
+    
     async def _initialize_tools(self):
         """Initialize all available tools"""
         try:
             # RAG Tool for document search
             rag_tool = RAGTool()
-            await rag_tool.initialize()
             
             # SQL Tool for data analytics
             sql_tool = SQLTool()
-            await sql_tool.initialize()
             
             # Web Tool for real-time search
             web_tool = WebTool()
             
+            # The RAG and SQL tools set up independent resources, so start them together
+            await asyncio.gather(rag_tool.initialize(), sql_tool.initialize())
+            
             self.tools = [rag_tool, sql_tool, web_tool]
             
             logger.info(f"Initialized {len(self.tools)} tools")
@@ -97,6 +121,10 @@ Guidelines:
 4. Always provide detailed, helpful answers
 5. When using sql_analytics, be specific about what data or charts you want
 6. Cite sources when available
+7. If the question needs several independent tools, write one Action/Action Input pair per tool before the Observation; they run at the same time
+
+Previous conversation:
+{chat_history}
 
 Begin!
 
@@ -105,20 +133,21 @@ Thought: {agent_scratchpad}
 """)
             
             # Create the agent
-            self.agent = create_react_agent(
+            self.agent = create_parallel_react_agent(
                 llm=self.llm,
                 tools=self.tools,
                 prompt=react_prompt
             )
             
             # Create agent executor
-            self.agent_executor = AgentExecutor(
+            self.agent_executor = ParallelAgentExecutor(
                 agent=self.agent,
                 tools=self.tools,
                 verbose=True,
                 handle_parsing_errors=True,
                 max_iterations=config.AGENT_MAX_ITERATIONS,
-                return_intermediate_steps=True
+                return_intermediate_steps=True,
+                max_concurrent_tools=config.AGENT_TOOL_CONCURRENCY_LIMIT
             )
             
             logger.info("Agent created successfully")
@@ -134,42 +163,12 @@ Thought: {agent_scratchpad}
             if not self.agent_executor:
                 await self.initialize()
             
-            # Get or create session memory
-            if session_id not in self.sessions:
-                self.sessions[session_id] = {
-                    "memory": ConversationBufferMemory(
-                        memory_key="chat_history",
-                        return_messages=True
-                    ),
-                    "messages": []
-                }
-            
-            session_memory = self.sessions[session_id]["memory"]
-            
-            # Add user message to session
-            user_message = HumanMessage(content=query)
-            self.sessions[session_id]["messages"].append({
-                "type": "user",
-                "content": query,
-                "timestamp": datetime.now().isoformat()
-            })
+            session = await self._start_turn(query, session_id)
             
             # Run the agent
-            result = await self._run_agent(query, session_memory)
+            result = await self._run_agent(query, session["memory"])
             
-            # Add assistant response to session
-            self.sessions[session_id]["messages"].append({
-                "type": "assistant", 
-                "content": result["answer"],
-                "timestamp": datetime.now().isoformat(),
-                "sources": result.get("sources", []),
-                "charts": result.get("charts", []),
-                "query_type": result.get("query_type", "general")
-            })
-            
-            # Update memory
-            session_memory.chat_memory.add_user_message(query)
-            session_memory.chat_memory.add_ai_message(result["answer"])
+            await self._finish_turn(query, session_id, session, result)
             
             return result
             
@@ -182,123 +181,310 @@ Thought: {agent_scratchpad}
                 "query_type": "error"
             }
     
-    async def _run_agent(self, query: str, memory: ConversationBufferMemory) -> Dict[str, Any]:
-        """Run the agent with the given query"""
+    async def process_batch(self, queries: List[str], session_id: str = "default") -> List[Dict[str, Any]]:
+        """Process several queries concurrently, returning results in input order"""
+        # Initialize once up front rather than racing one initialization per query
+        if not self.agent_executor:
+            await self.initialize()
+        
+        semaphore = asyncio.Semaphore(max(1, config.BATCH_CONCURRENCY))
+        
+        async def process(query: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.process_query(query, session_id)
+        
+        return await asyncio.gather(*(process(query) for query in queries))
+    
+    async def stream_query(self, query: str, session_id: str = "default") -> AsyncIterator[Dict[str, Any]]:
+        """Process a user query, yielding final-answer tokens as the agent produces them
+        
+        Yields {"type": "token", "content": ...} events followed by one
+        {"type": "result", ...} event carrying the same fields as process_query.
+        """
         try:
-            # Prepare input with memory
-            chat_history = memory.chat_memory.messages
-            history_text = ""
+            # Initialize if not already done
+            if not self.agent_executor:
+                await self.initialize()
             
-            for msg in chat_history[-6:]:  # Last 3 exchanges
-                if isinstance(msg, HumanMessage):
-                    history_text += f"Human: {msg.content}\n"
-                elif isinstance(msg, AIMessage):
-                    history_text += f"Assistant: {msg.content}\n"
+            session = await self._start_turn(query, session_id)
+            agent_input = await self._agent_input(query, session["memory"])
             
-            # Run the agent
-            agent_input = {
-                "input": query,
-                "chat_history": history_text
-            }
+            root_run_id = None
+            output = None
+            llm_text = {}
+            streamed = {}
             
-            result = await self.agent_executor.ainvoke(agent_input)
+            async for event in self.agent_executor.astream_events(agent_input, version="v1"):
+                if root_run_id is None:
+                    root_run_id = event["run_id"]
+                
+                kind = event["event"]
+                if kind in ("on_llm_stream", "on_chat_model_stream"):
+                    # Only forward what the LLM writes after the final answer marker
+                    run_id = event["run_id"]
+                    text = llm_text.get(run_id, "") + self._chunk_text(event["data"].get("chunk"))
+                    llm_text[run_id] = text
+                    
+                    marker_at = text.find(FINAL_ANSWER_MARKER)
+                    if marker_at == -1:
+                        continue
+                    
+                    start = streamed.get(run_id, marker_at + len(FINAL_ANSWER_MARKER))
+                    token = text[start:]
+                    if start == marker_at + len(FINAL_ANSWER_MARKER):
+                        token = token.lstrip()
+                    if token:
+                        streamed[run_id] = len(text)
+                        yield {"type": "token", "content": token}
+                
+                elif kind == "on_chain_end" and event["run_id"] == root_run_id:
+                    output = event["data"].get("output")
             
-            # Extract information from result
-            answer = result.get("output", "I couldn't generate a response.")
-            intermediate_steps = result.get("intermediate_steps", [])
+            result = self._build_result(query, output or {})
             
-            # Determine query type and extract additional data
-            query_type = self._determine_query_type(query, intermediate_steps)
-            sources = self._extract_sources(intermediate_steps)
-            charts = self._extract_charts(intermediate_steps)
+            # Nothing was streamed when the answer came from the LLM response cache or a
+            # return_direct tool, so deliver it in one piece
+            if not streamed:
+                yield {"type": "token", "content": result["answer"]}
             
-            return {
-                "answer": answer,
-                "sources": sources,
-                "charts": charts,
-                "query_type": query_type,
-                "intermediate_steps": intermediate_steps
+            await self._finish_turn(query, session_id, session, result)
+            
+            yield {
+                "type": "result",
+                **{key: value for key, value in result.items() if key != "intermediate_steps"}
+            }
+            
+        except Exception as e:
+            logger.error(f"Error streaming query: {str(e)}")
+            yield {
+                "type": "result",
+                "answer": f"I apologize, but I encountered an error while processing your query: {str(e)}",
+                "sources": [],
+                "charts": [],
+                "query_type": "error"
             }
+    
+    @staticmethod
+    def _chunk_text(chunk: Any) -> str:
+        """Get the text of a streamed LLM or chat model chunk"""
+        if chunk is None:
+            return ""
+        if isinstance(chunk, str):
+            return chunk
+        if hasattr(chunk, 'content'):
+            return chunk.content
+        return getattr(chunk, 'text', "")
+    
+    async def _start_turn(self, query: str, session_id: str) -> Dict[str, Any]:
+        """Get or create a session and record the user's message"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = {
+                "memory": self._create_memory(session_id),
+                "messages": []
+            }
+        
+        # Re-insert so the TTL counts from the last activity
+        self.sessions[session_id] = session
+        
+        # Add user message to session
+        await self._record_message(session_id, session, {
+            "type": "user",
+            "content": query,
+            "timestamp": datetime.now().isoformat()
+        })
+        
+        return session
+    
+    async def _finish_turn(self, query: str, session_id: str, session: Dict[str, Any], result: Dict[str, Any]):
+        """Record the assistant's response and update conversation memory"""
+        # Add assistant response to session
+        await self._record_message(session_id, session, {
+            "type": "assistant", 
+            "content": result["answer"],
+            "timestamp": datetime.now().isoformat(),
+            "sources": result.get("sources", []),
+            "charts": result.get("charts", []),
+            "query_type": result.get("query_type", "general")
+        })
+        
+        # Update memory (a blocking network call when backed by Redis)
+        await asyncio.to_thread(self._update_memory, session["memory"], query, result["answer"])
+    
+    def _create_memory(self, session_id: str) -> ConversationBufferWindowMemory:
+        """Create conversation memory for a session, backed by Redis when configured"""
+        memory_kwargs = {}
+        if self.redis is not None:
+            memory_kwargs["chat_memory"] = RedisChatMessageHistory(
+                session_id,
+                url=config.REDIS_URL,
+                key_prefix="autoanalyst:memory:",
+                ttl=config.SESSION_TTL
+            )
+        
+        return ConversationBufferWindowMemory(
+            k=config.MEMORY_WINDOW_EXCHANGES,
+            memory_key="chat_history",
+            return_messages=False,
+            **memory_kwargs
+        )
+    
+    @staticmethod
+    def _update_memory(memory: ConversationBufferWindowMemory, query: str, answer: str):
+        """Add an exchange to memory, keeping only the messages the window can read"""
+        chat_memory = memory.chat_memory
+        chat_memory.add_user_message(query)
+        chat_memory.add_ai_message(answer)
+        
+        if isinstance(chat_memory, RedisChatMessageHistory):
+            # Redis history is stored newest first
+            chat_memory.redis_client.ltrim(chat_memory.key, 0, 2 * memory.k - 1)
+        else:
+            del chat_memory.messages[:-2 * memory.k]
+    
+    @staticmethod
+    def _messages_key(session_id: str) -> str:
+        return f"autoanalyst:messages:{session_id}"
+    
+    async def _record_message(self, session_id: str, session: Dict[str, Any], message: Dict[str, Any]):
+        """Append a message to the session log, keeping at most SESSION_MAX_MESSAGES"""
+        if self.redis is not None:
+            key = self._messages_key(session_id)
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.rpush(key, orjson.dumps(message, default=str))
+                pipe.ltrim(key, -config.SESSION_MAX_MESSAGES, -1)
+                pipe.expire(key, config.SESSION_TTL)
+                await pipe.execute()
+            return
+        
+        messages = session["messages"]
+        messages.append(message)
+        if len(messages) > config.SESSION_MAX_MESSAGES:
+            del messages[:-config.SESSION_MAX_MESSAGES]
+    
+    async def _run_agent(self, query: str, memory: ConversationBufferWindowMemory) -> Dict[str, Any]:
+        """Run the agent with the given query"""
+        try:
+            agent_input = await self._agent_input(query, memory)
+            
+            # Run the agent
+            result = await self.agent_executor.ainvoke(agent_input)
+            
+            return self._build_result(query, result)
             
         except Exception as e:
             logger.error(f"Error running agent: {str(e)}")
             raise
     
+    async def _agent_input(self, query: str, memory: ConversationBufferWindowMemory) -> Dict[str, Any]:
+        """Build agent input from the query and conversation memory"""
+        # Window memory renders the last k exchanges as the chat_history string
+        memory_variables = await asyncio.to_thread(memory.load_memory_variables, {})
+        
+        return {
+            "input": query,
+            **memory_variables
+        }
+    
+    def _build_result(self, query: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract the answer, sources and charts from agent output"""
+        answer = result.get("output", "I couldn't generate a response.")
+        intermediate_steps = result.get("intermediate_steps", [])
+        
+        # Determine query type and extract additional data
+        query_type = self._determine_query_type(query, intermediate_steps)
+        observations = self._parse_steps(intermediate_steps)
+        sources = self._extract_sources(observations)
+        charts = self._extract_charts(observations)
+        
+        return {
+            "answer": answer,
+            "sources": sources,
+            "charts": charts,
+            "query_type": query_type,
+            "intermediate_steps": intermediate_steps
+        }
+    
     def _determine_query_type(self, query: str, steps: List) -> str:
         """Determine the type of query based on tools used"""
-        tools_used = []
+        tools_used = {
+            step[0].tool
+            for step in steps
+            if len(step) >= 2 and hasattr(step[0], 'tool')
+        }
+        
+        # Checked in priority order
+        for tool_name in QUERY_TYPE_PRIORITY:
+            if tool_name in tools_used:
+                return tool_name
+        return "general"
+    
+    def _parse_steps(self, steps: List) -> List[Dict[str, Any]]:
+        """Parse each step's observation once into a dict, skipping unparseable ones"""
+        observations = []
         
         for step in steps:
             if len(step) >= 2:
-                action = step[0]
-                if hasattr(action, 'tool'):
-                    tools_used.append(action.tool)
+                observation = self._safe_parse(step[1])
+                if observation is not None:
+                    observations.append(observation)
         
-        if "rag_search" in tools_used:
-            return "rag_search"
-        elif "sql_analytics" in tools_used:
-            return "sql_analytics"
-        elif "web_search" in tools_used:
-            return "web_search"
-        else:
-            return "general"
+        return observations
     
-    def _extract_sources(self, steps: List) -> List[Dict[str, Any]]:
-        """Extract sources from intermediate steps"""
+    @staticmethod
+    def _safe_parse(observation: Any) -> Optional[Dict[str, Any]]:
+        """Return an observation as a dict, decoding JSON strings or bytes"""
+        if isinstance(observation, dict):
+            return observation
+        
+        if isinstance(observation, (str, bytes)):
+            try:
+                parsed = orjson.loads(observation)
+            except orjson.JSONDecodeError:
+                return None
+            if isinstance(parsed, dict):
+                return parsed
+        
+        return None
+    
+    def _extract_sources(self, observations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Extract sources from parsed observations"""
         sources = []
         
-        for step in steps:
-            if len(step) >= 2:
-                observation = step[1]
-                
-                # Handle different response types
-                if isinstance(observation, dict):
-                    if "sources" in observation:
-                        sources.extend(observation["sources"])
-                elif isinstance(observation, str):
-                    # Try to parse JSON response
-                    try:
-                        import json
-                        parsed = json.loads(observation)
-                        if isinstance(parsed, dict) and "sources" in parsed:
-                            sources.extend(parsed["sources"])
-                    except:
-                        pass
+        for observation in observations:
+            sources.extend(observation.get("sources", []))
         
         return sources
     
-    def _extract_charts(self, steps: List) -> List[Dict[str, Any]]:
-        """Extract charts from intermediate steps"""
+    def _extract_charts(self, observations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Extract charts from parsed observations"""
         charts = []
         
-        for step in steps:
-            if len(step) >= 2:
-                observation = step[1]
-                
-                # Handle different response types
-                if isinstance(observation, dict):
-                    if "charts" in observation:
-                        charts.extend(observation["charts"])
-                elif isinstance(observation, str):
-                    # Try to parse JSON response
-                    try:
-                        import json
-                        parsed = json.loads(observation)
-                        if isinstance(parsed, dict) and "charts" in parsed:
-                            charts.extend(parsed["charts"])
-                    except:
-                        pass
+        for observation in observations:
+            charts.extend(observation.get("charts", []))
         
         return charts
     
     async def get_session_history(self, session_id: str) -> List[Dict[str, Any]]:
         """Get chat history for a session"""
+        if self.redis is not None:
+            messages = await self.redis.lrange(self._messages_key(session_id), 0, -1)
+            return [orjson.loads(message) for message in messages]
+        
         if session_id in self.sessions:
             return self.sessions[session_id]["messages"]
         return []
     
     async def clear_session(self, session_id: str) -> bool:
         """Clear a session's history"""
+        if self.redis is not None:
+            self.sessions.pop(session_id, None)
+            deleted = await self.redis.delete(
+                self._messages_key(session_id),
+                f"autoanalyst:memory:{session_id}"
+            )
+            return deleted > 0
+        
         if session_id in self.sessions:
             del self.sessions[session_id]
             return True
@@ -308,14 +494,21 @@ Thought: {agent_scratchpad}
         """Check health of the query planner"""
         tool_status = {}
         
+        # Check tools concurrently so latency is the slowest check, not the sum
+        checked_tools = [tool for tool in self.tools if hasattr(tool, 'health_check')]
+        results = await asyncio.gather(
+            *(tool.health_check() for tool in checked_tools),
+            return_exceptions=True
+        )
+        
         for tool in self.tools:
-            try:
-                if hasattr(tool, 'health_check'):
-                    tool_status[tool.name] = await tool.health_check()
-                else:
-                    tool_status[tool.name] = {"status": "available"}
-            except Exception as e:
-                tool_status[tool.name] = {"status": "error", "error": str(e)}
+            tool_status[tool.name] = {"status": "available"}
+        
+        for tool, result in zip(checked_tools, results):
+            if isinstance(result, Exception):
+                tool_status[tool.name] = {"status": "error", "error": str(result)}
+            else:
+                tool_status[tool.name] = result
         
         return {
             "status": "healthy" if self.agent_executor else "not_initialized",
@@ -0,0 +1,36 @@
+from typing import Any, Coroutine, Optional
+import asyncio
+import concurrent.futures
+import threading
+
+# One long-lived loop on a daemon thread serves every sync tool call, so repeated
+# _run calls skip loop setup/teardown and keep loop-bound clients alive
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Get the background event loop, starting its thread on first use"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="tool-loop", daemon=True).start()
+                _loop = loop
+    return _loop
+
+def run_sync(coro: Coroutine) -> Any:
+    """Run a coroutine on the background loop and block until it finishes"""
+    loop = _get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    
+    if running is loop:
+        # Called synchronously from a coroutine already on the background loop:
+        # waiting on that loop would deadlock, so run on an isolated one instead
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, coro).result()
+    
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
@@ -1,19 +1,89 @@
 from langchain.tools import BaseTool
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores.utils import DistanceStrategy
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import PyPDFLoader, TextLoader, UnstructuredWordDocumentLoader
 from langchain.schema import Document
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import os
+import asyncio
 import pickle
+import orjson
 import logging
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime
+from functools import partial
+import numpy as np
 
 from app.llm.factory import create_llm, create_embeddings
 from app.config import get_settings
+from app.agents.tools.event_loop import run_sync
 
 logger = logging.getLogger(__name__)
 
+# Kept byte-identical across calls so it forms a cacheable prompt prefix
+_ANSWER_INSTRUCTIONS = """Based on the following context from uploaded documents, please answer the user's question. 
+If the context doesn't contain enough information to answer the question completely, say so and provide what information is available."""
+
+# Process pool for loaders that are CPU-bound and hold the GIL (unstructured/lxml)
+_loader_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_loader_pool() -> ProcessPoolExecutor:
+    """Get the shared loader process pool, creating it on first use"""
+    global _loader_pool
+    if _loader_pool is None:
+        _loader_pool = ProcessPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) // 2))
+    return _loader_pool
+
+# Thread pool reserved for FAISS searches, which release the GIL, so they don't
+# queue behind document loading and index saves in the default executor
+_search_pool: Optional[ThreadPoolExecutor] = None
+
+def _get_search_pool() -> ThreadPoolExecutor:
+    """Get the shared FAISS search thread pool, creating it on first use"""
+    global _search_pool
+    if _search_pool is None:
+        _search_pool = ThreadPoolExecutor(
+            max_workers=get_settings().FAISS_SEARCH_THREADS,
+            thread_name_prefix="faiss-search"
+        )
+    return _search_pool
+
+def _load_word_document(file_path: str) -> List[Document]:
+    """Load a Word document (runs in a worker process)"""
+    return UnstructuredWordDocumentLoader(file_path).load()
+
+class _IndexLock:
+    """Lets FAISS searches run concurrently in threads while index writes run exclusively"""
+    
+    def __init__(self):
+        self._writer = asyncio.Lock()
+        self._readers = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+    
+    @asynccontextmanager
+    async def read(self):
+        # Readers queue behind a waiting writer so writes are not starved
+        async with self._writer:
+            self._readers += 1
+            self._idle.clear()
+        try:
+            yield
+        finally:
+            self._readers -= 1
+            if self._readers == 0:
+                self._idle.set()
+    
+    @asynccontextmanager
+    async def write(self):
+        async with self._writer:
+            await self._idle.wait()
+            yield
+
 class RAGTool(BaseTool):
     """Tool for Retrieval-Augmented Generation using FAISS vector database"""
     
@@ -35,9 +105,16 @@ class RAGTool(BaseTool):
         super().__init__(**kwargs)
         object.__setattr__(self, '_settings', get_settings())
         object.__setattr__(self, 'embeddings', None)
+        object.__setattr__(self, 'llm', None)
         object.__setattr__(self, 'vectorstore', None)
         object.__setattr__(self, 'text_splitter', None)
         object.__setattr__(self, 'document_metadata', {})
+        object.__setattr__(self, '_index_lock', _IndexLock())
+        object.__setattr__(self, '_query_vectors', OrderedDict())
+        object.__setattr__(self, '_pending_searches', [])
+        object.__setattr__(self, '_batch_task', None)
+        object.__setattr__(self, '_dirty', False)
+        object.__setattr__(self, '_flush_task', None)
         
     @property
     def settings(self):
@@ -50,6 +127,9 @@ class RAGTool(BaseTool):
             # Initialize embeddings using factory
             object.__setattr__(self, 'embeddings', create_embeddings())
             
+            # Create the answering LLM once so its HTTP connections are reused
+            object.__setattr__(self, 'llm', create_llm())
+            
             # Initialize text splitter
             object.__setattr__(self, 'text_splitter', RecursiveCharacterTextSplitter(
                 chunk_size=self.settings.CHUNK_SIZE,
@@ -69,9 +149,14 @@ class RAGTool(BaseTool):
     async def _load_or_create_vectorstore(self):
         """Load existing vector store or create a new one"""
         vectorstore_path = os.path.join(self.settings.VECTOR_DB_PATH, "faiss_index")
-        metadata_path = os.path.join(self.settings.VECTOR_DB_PATH, "metadata.pkl")
+        metadata_path = os.path.join(self.settings.VECTOR_DB_PATH, "metadata.json")
+        legacy_metadata_path = os.path.join(self.settings.VECTOR_DB_PATH, "metadata.pkl")
+        
+        # save_local writes a directory holding index.faiss and index.pkl
+        has_index = os.path.exists(os.path.join(vectorstore_path, "index.faiss"))
+        has_legacy_metadata = not os.path.exists(metadata_path) and os.path.exists(legacy_metadata_path)
         
-        if os.path.exists(vectorstore_path + ".faiss") and os.path.exists(metadata_path):
+        if has_index and (os.path.exists(metadata_path) or has_legacy_metadata):
             try:
                 # Load existing vector store
                 vectorstore = FAISS.load_local(
@@ -82,10 +167,20 @@ class RAGTool(BaseTool):
                 object.__setattr__(self, 'vectorstore', vectorstore)
                 
                 # Load metadata
-                with open(metadata_path, 'rb') as f:
-                    metadata = pickle.load(f)
+                if has_legacy_metadata:
+                    with open(legacy_metadata_path, 'rb') as f:
+                        metadata = pickle.load(f)
+                else:
+                    with open(metadata_path, 'rb') as f:
+                        metadata = orjson.loads(f.read())
                 object.__setattr__(self, 'document_metadata', metadata)
                 
+                if has_legacy_metadata:
+                    # Migrate to JSON metadata once, then drop the pickle
+                    await self._save_vectorstore()
+                    os.remove(legacy_metadata_path)
+                    logger.info("Migrated document metadata from metadata.pkl to metadata.json")
+                
                 logger.info(f"Loaded existing vector store with {len(self.document_metadata)} documents")
                 
             except Exception as e:
@@ -101,12 +196,17 @@ class RAGTool(BaseTool):
             from langchain_community.vectorstores.faiss import dependable_faiss_import
             faiss = dependable_faiss_import()
             
-            # Initialize empty index with correct dimensions
-            dimension = self.settings.EMBEDDING_DIMENSION
-            index = faiss.IndexFlatL2(dimension)
+            # Start unquantized; SQ8 is only trained once a real sample exists
+            index = self._new_index(faiss, quantize=False)
             
             # Create empty vectorstore
-            vectorstore = FAISS(self.embeddings, index, {}, {}, {})
+            vectorstore = FAISS(
+                self.embeddings,
+                index,
+                InMemoryDocstore({}),
+                {},
+                distance_strategy=DistanceStrategy.EUCLIDEAN_DISTANCE
+            )
             object.__setattr__(self, 'vectorstore', vectorstore)
             
             # Save the empty vector store
@@ -118,100 +218,248 @@ class RAGTool(BaseTool):
             logger.error(f"Error creating empty vector store: {str(e)}")
             raise
     
+    def _new_index(self, faiss, quantize: bool):
+        """Build an empty FAISS index for the configured index type"""
+        dimension = self.settings.EMBEDDING_DIMENSION
+        if self.settings.FAISS_INDEX_TYPE == "flat":
+            if quantize:
+                # 8-bit codes cut memory per vector 4x versus float32
+                return faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+            return faiss.IndexFlatL2(dimension)
+        
+        # HNSW graph gives sub-linear search instead of a brute-force scan
+        if quantize:
+            index = faiss.IndexHNSWSQ(dimension, faiss.ScalarQuantizer.QT_8bit, self.settings.FAISS_HNSW_M)
+        else:
+            index = faiss.IndexHNSWFlat(dimension, self.settings.FAISS_HNSW_M)
+        index.hnsw.efConstruction = self.settings.FAISS_HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = self.settings.FAISS_HNSW_EF_SEARCH
+        return index
+    
+    def _insert_batch(self, texts: List[str], vectors: List[List[float]], metadatas: List[dict]):
+        """Add one embedded batch to the index, then quantize it once it is large enough"""
+        self.vectorstore.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas)
+        if self.settings.FAISS_QUANTIZATION == "sq8":
+            self._quantize_index()
+    
+    def _quantize_index(self):
+        """Rebuild the float index as SQ8 once enough vectors exist to train on
+        
+        Quantizer value ranges are learned once; training on a handful of
+        vectors would leave degenerate ranges baked into the persisted index.
+        Row order is preserved, so the docstore id mapping stays valid.
+        """
+        index = self.vectorstore.index
+        if self.settings.FAISS_QUANTIZATION != "sq8" or index.ntotal < self.settings.FAISS_SQ_TRAIN_SIZE:
+            return
+        
+        from langchain_community.vectorstores.faiss import dependable_faiss_import
+        faiss = dependable_faiss_import()
+        if isinstance(index, (faiss.IndexHNSWSQ, faiss.IndexScalarQuantizer)):
+            return
+        
+        vectors = index.reconstruct_n(0, index.ntotal)
+        quantized = self._new_index(faiss, quantize=True)
+        quantized.train(vectors)
+        quantized.add(vectors)
+        self.vectorstore.index = quantized
+        logger.info(f"Rebuilt vector index as SQ8 from {len(vectors)} training vectors")
+    
     async def _save_vectorstore(self):
         """Save vector store and metadata"""
         try:
-            os.makedirs(self.settings.VECTOR_DB_PATH, exist_ok=True)
-            
-            vectorstore_path = os.path.join(self.settings.VECTOR_DB_PATH, "faiss_index")
-            metadata_path = os.path.join(self.settings.VECTOR_DB_PATH, "metadata.pkl")
-            
-            # Save vector store
-            self.vectorstore.save_local(vectorstore_path)
-            
-            # Save metadata
-            with open(metadata_path, 'wb') as f:
-                pickle.dump(self.document_metadata, f)
+            await asyncio.to_thread(self._write_vectorstore, self.document_metadata)
                 
         except Exception as e:
             logger.error(f"Error saving vector store: {str(e)}")
             raise
     
+    def _write_vectorstore(self, document_metadata: Dict[str, Any]):
+        """Write vector store and metadata to disk (blocking)"""
+        os.makedirs(self.settings.VECTOR_DB_PATH, exist_ok=True)
+        
+        vectorstore_path = os.path.join(self.settings.VECTOR_DB_PATH, "faiss_index")
+        metadata_path = os.path.join(self.settings.VECTOR_DB_PATH, "metadata.json")
+        
+        # Save vector store
+        self.vectorstore.save_local(vectorstore_path)
+        
+        # Save metadata
+        with open(metadata_path, 'wb') as f:
+            f.write(orjson.dumps(document_metadata))
+    
+    async def _mark_dirty(self):
+        """Record unsaved changes and schedule a debounced save"""
+        object.__setattr__(self, '_dirty', True)
+        
+        if self.settings.VECTOR_DB_SAVE_DELAY <= 0:
+            await self.flush()
+            return
+        
+        # Coalesce every change made within the delay into one full index write
+        if self._flush_task is None or self._flush_task.done():
+            object.__setattr__(self, '_flush_task', asyncio.create_task(self._flush_later()))
+    
+    async def _flush_later(self):
+        """Save pending changes once the save delay has passed"""
+        await asyncio.sleep(self.settings.VECTOR_DB_SAVE_DELAY)
+        try:
+            await self.flush()
+        except Exception:
+            # Already logged; changes stay dirty for the next save
+            pass
+    
+    async def flush(self):
+        """Save the vector store now if it has unsaved changes"""
+        if not self._dirty:
+            return
+        
+        # Hold off writers (searches may continue) so the index and docstore are saved consistently
+        async with self._index_lock.read():
+            object.__setattr__(self, '_dirty', False)
+            try:
+                await self._save_vectorstore()
+            except Exception:
+                object.__setattr__(self, '_dirty', True)
+                raise
+    
+    async def close(self):
+        """Cancel any scheduled save and write pending changes"""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+    
     async def add_document(self, file_path: str) -> Dict[str, Any]:
-        """Add a document to the vector store"""
+        """Add a document to the vector store
+        
+        Loading/splitting, embedding and index writes run as concurrent stages
+        connected by bounded queues, so embedding batches overlap with both the
+        document parse and the FAISS insertion of earlier batches.
+        """
         try:
-            # Load document based on file type
-            documents = await self._load_document(file_path)
-            
-            if not documents:
-                raise ValueError("No content extracted from document")
+            filename = os.path.basename(file_path)
+            batch_size = self.settings.EMBEDDING_BATCH_SIZE
+            workers = max(1, self.settings.EMBEDDING_CONCURRENCY)
             
-            # Split documents into chunks
-            chunks = self.text_splitter.split_documents(documents)
+            chunk_queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+            vector_queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+            counts = {"chunks": 0, "written": 0}
             
-            # Add metadata
-            filename = os.path.basename(file_path)
-            for chunk in chunks:
-                chunk.metadata.update({
-                    "source": filename,
-                    "file_path": file_path,
-                    "added_date": datetime.now().isoformat(),
-                    "chunk_index": chunks.index(chunk)
-                })
+            async def produce():
+                # Load document based on file type
+                documents = await self._load_document(file_path)
+                
+                if not documents:
+                    raise ValueError("No content extracted from document")
+                
+                # Split documents into chunks (pure-Python CPU work)
+                chunks = await asyncio.to_thread(self.text_splitter.split_documents, documents)
+                counts["chunks"] = len(chunks)
+                
+                # Add metadata
+                added_date = datetime.now().isoformat()
+                for i, chunk in enumerate(chunks):
+                    chunk.metadata.update({
+                        "source": filename,
+                        "file_path": file_path,
+                        "added_date": added_date,
+                        "chunk_index": i
+                    })
+                
+                for i in range(0, len(chunks), batch_size):
+                    await chunk_queue.put(chunks[i:i + batch_size])
+                
+                for _ in range(workers):
+                    await chunk_queue.put(None)
+            
+            async def embed():
+                while True:
+                    batch = await chunk_queue.get()
+                    if batch is None:
+                        return
+                    
+                    texts = [chunk.page_content for chunk in batch]
+                    vectors = await self.embeddings.aembed_documents(texts)
+                    await vector_queue.put((texts, vectors, [chunk.metadata for chunk in batch]))
+            
+            async def embed_all():
+                await asyncio.gather(*[embed() for _ in range(workers)])
+                await vector_queue.put(None)
+            
+            async def write():
+                while True:
+                    item = await vector_queue.get()
+                    if item is None:
+                        return
+                    
+                    texts, vectors, metadatas = item
+                    async with self._index_lock.write():
+                        # HNSW inserts are the heaviest ingestion step; keep them off the event loop
+                        await asyncio.to_thread(self._insert_batch, texts, vectors, metadatas)
+                    counts["written"] += len(texts)
+            
+            await self._run_pipeline(produce(), embed_all(), write())
             
             # Add to vector store
-            if chunks:
-                if self.vectorstore.index.ntotal == 1:  # Only dummy document
-                    # Replace dummy document
-                    new_vectorstore = FAISS.from_documents(
-                        chunks,
-                        self.embeddings
-                    )
-                    object.__setattr__(self, 'vectorstore', new_vectorstore)
-                else:
-                    # Add to existing store
-                    self.vectorstore.add_documents(chunks)
-                
+            if counts["written"]:
                 # Update metadata
                 new_metadata = self.document_metadata.copy()
                 new_metadata[filename] = {
                     "file_path": file_path,
-                    "chunks_count": len(chunks),
+                    "chunks_count": counts["written"],
                     "added_date": datetime.now().isoformat(),
                     "file_size": os.path.getsize(file_path)
                 }
                 object.__setattr__(self, 'document_metadata', new_metadata)
                 
-                # Save updated vector store
-                await self._save_vectorstore()
+                # Schedule a save of the updated vector store
+                await self._mark_dirty()
                 
-                logger.info(f"Added document '{filename}' with {len(chunks)} chunks")
+                logger.info(f"Added document '{filename}' with {counts['written']} chunks")
                 
                 return {
                     "status": "success",
                     "filename": filename,
-                    "chunks_added": len(chunks)
+                    "chunks_added": counts["written"]
                 }
             
         except Exception as e:
             logger.error(f"Error adding document: {str(e)}")
             raise
     
+    @staticmethod
+    async def _run_pipeline(*stages):
+        """Run pipeline stages concurrently, cancelling the rest if one fails"""
+        tasks = [asyncio.ensure_future(stage) for stage in stages]
+        try:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception():
+                    raise task.exception()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
     async def _load_document(self, file_path: str) -> List[Document]:
         """Load document based on file type"""
         file_extension = os.path.splitext(file_path)[1].lower()
         
         try:
+            if file_extension in ['.docx', '.doc']:
+                # unstructured parsing is CPU-heavy, so keep it out of this process' GIL
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(_get_loader_pool(), _load_word_document, file_path)
+            
             if file_extension == '.pdf':
                 loader = PyPDFLoader(file_path)
             elif file_extension in ['.txt', '.md']:
                 loader = TextLoader(file_path, encoding='utf-8')
-            elif file_extension in ['.docx', '.doc']:
-                loader = UnstructuredWordDocumentLoader(file_path)
             else:
                 raise ValueError(f"Unsupported file type: {file_extension}")
             
-            documents = loader.load()
+            # Blocking file I/O and parsing run in a worker thread
+            documents = await asyncio.to_thread(loader.load)
             return documents
             
         except Exception as e:
@@ -220,8 +468,7 @@ class RAGTool(BaseTool):
     
     def _run(self, query: str) -> Dict[str, Any]:
         """Synchronous run method (required by BaseTool)"""
-        import asyncio
-        return asyncio.run(self._arun(query))
+        return run_sync(self._arun(query))
     
     async def _arun(self, query: str) -> Dict[str, Any]:
         """Search for relevant documents based on query"""
@@ -250,18 +497,15 @@ class RAGTool(BaseTool):
                 }
             
             # Perform similarity search
-            docs = self.vectorstore.similarity_search_with_score(
-                query,
-                k=5  # Use a default if TOP_K_DOCUMENTS not in settings
-            )
+            docs = await self._search(query, self.settings.TOP_K_DOCUMENTS)
             
             # Filter by similarity threshold
-            relevant_docs = []
-            for doc, score in docs:
-                # Convert score to similarity (FAISS returns distance, lower is better)
-                similarity = 1.0 / (1.0 + score)
-                if similarity > 0.7:  # Threshold for relevance
-                    relevant_docs.append((doc, similarity))
+            # Convert scores to similarity (FAISS returns distance, lower is better)
+            similarities = 1.0 / (1.0 + np.fromiter((score for _, score in docs), dtype=np.float32, count=len(docs)))
+            relevant_docs = [
+                (docs[i][0], float(similarities[i]))
+                for i in np.flatnonzero(similarities > 0.7)  # Threshold for relevance
+            ]
             
             if not relevant_docs:
                 return {
@@ -270,8 +514,13 @@ class RAGTool(BaseTool):
                     "query": query
                 }
                 
-            # Format context from relevant documents
-            context = "\n\n".join([f"Document: {doc.metadata.get('source', 'Unknown')}\nContent: {doc.page_content}" for doc, _ in relevant_docs])
+            # Format context from relevant documents in a stable order so the same
+            # retrieval always yields the same prompt prefix
+            context_docs = sorted(
+                (doc for doc, _ in relevant_docs),
+                key=lambda doc: (doc.metadata.get('source', ''), doc.metadata.get('chunk_index', 0))
+            )
+            context = "\n\n".join([f"Document: {doc.metadata.get('source', 'Unknown')}\nContent: {doc.page_content}" for doc in context_docs])
             
             # Generate answer
             answer = await self._generate_answer(query, context)
@@ -299,13 +548,103 @@ class RAGTool(BaseTool):
                 "query": query
             }
     
+    async def _search(self, query: str, k: int) -> List[Tuple[Document, float]]:
+        """Find the k nearest chunks, micro-batching queries that arrive together"""
+        if self.settings.RAG_BATCH_WINDOW_MS <= 0:
+            distances, indices = await self._search_vectors([await self._embed_query(query)], k)
+            return self._lookup_results(distances[0], indices[0])
+        
+        future = asyncio.get_running_loop().create_future()
+        self._pending_searches.append((query, k, future))
+        if self._batch_task is None or self._batch_task.done():
+            object.__setattr__(self, '_batch_task', asyncio.create_task(self._drain_searches()))
+        return await future
+    
+    async def _drain_searches(self):
+        """Serve pending searches with one embedding call and one FAISS search per window"""
+        while self._pending_searches:
+            await asyncio.sleep(self.settings.RAG_BATCH_WINDOW_MS / 1000)
+            
+            batch = self._pending_searches
+            object.__setattr__(self, '_pending_searches', [])
+            
+            try:
+                vectors = await self._embed_queries([query for query, _, _ in batch])
+                distances, indices = await self._search_vectors(vectors, max(k for _, k, _ in batch))
+                
+                for row, (_, query_k, future) in enumerate(batch):
+                    if not future.done():
+                        future.set_result(self._lookup_results(distances[row], indices[row])[:query_k])
+                    
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+    
+    async def _search_vectors(self, vectors: List[List[float]], k: int):
+        """Search the FAISS index directly, bypassing LangChain's per-result wrapping"""
+        async with self._index_lock.read():
+            return await asyncio.get_running_loop().run_in_executor(
+                _get_search_pool(),
+                partial(
+                    self.vectorstore.index.search,
+                    np.asarray(vectors, dtype='float32'),
+                    k,
+                    params=self._search_params(k)
+                )
+            )
+    
+    def _lookup_results(self, distances, indices) -> List[Tuple[Document, float]]:
+        """Map one row of FAISS search output to stored documents"""
+        results = []
+        for distance, i in zip(distances, indices):
+            if i == -1:  # Fewer than k vectors in the index
+                continue
+            doc_id = self.vectorstore.index_to_docstore_id[i]
+            results.append((self.vectorstore.docstore.search(doc_id), float(distance)))
+        return results
+    
+    async def _embed_query(self, query: str) -> List[float]:
+        """Embed a query, reusing vectors of recently seen queries"""
+        return (await self._embed_queries([query]))[0]
+    
+    async def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed queries in one call, reusing vectors of recently seen queries"""
+        # Snapshot hits before awaiting; concurrent calls may evict them meanwhile
+        found = {query: self._query_vectors[query] for query in queries if query in self._query_vectors}
+        misses = list({query for query in queries if query not in found})
+        if misses:
+            vectors = await self.embeddings.aembed_documents(misses)
+            found.update(zip(misses, vectors))
+        
+        results = []
+        for query in queries:
+            results.append(found[query])
+            self._query_vectors[query] = found[query]
+            self._query_vectors.move_to_end(query)
+        
+        while len(self._query_vectors) > self.settings.QUERY_EMBEDDING_CACHE_SIZE:
+            self._query_vectors.popitem(last=False)
+        return results
+    
+    def _search_params(self, k: int):
+        """Per-call HNSW search breadth, so concurrent searches never share mutable state"""
+        if getattr(self.vectorstore.index, 'hnsw', None) is None:
+            return None
+        
+        from langchain_community.vectorstores.faiss import dependable_faiss_import
+        faiss = dependable_faiss_import()
+        # efSearch below k would silently truncate results
+        return faiss.SearchParametersHNSW(efSearch=max(self.settings.FAISS_HNSW_EF_SEARCH, k))
+    
     async def _generate_answer(self, query: str, context: str) -> str:
         """Generate answer based on retrieved context"""
         try:
-            llm = create_llm()
+            llm = self.llm
             
-            prompt = f"""Based on the following context from uploaded documents, please answer the user's question. 
-If the context doesn't contain enough information to answer the question completely, say so and provide what information is available.
+            # Static instructions first, then context, then the question, so
+            # provider-side prompt caching can reuse the longest possible prefix
+            prompt = f"""{_ANSWER_INSTRUCTIONS}
 
 Context:
 {context}
@@ -336,6 +675,16 @@ Answer:"""
             for filename, metadata in self.document_metadata.items()
         ]
     
+    async def get_document(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Get one document in the vector store by filename"""
+        metadata = self.document_metadata.get(filename)
+        if metadata is None:
+            return None
+        return {
+            "filename": filename,
+            **metadata
+        }
+    
     async def delete_document(self, filename: str) -> bool:
         """Delete a document from the vector store"""
         try:
@@ -351,7 +700,7 @@ Answer:"""
             # We would need to rebuild the entire index
             # For now, we'll just remove from metadata and rebuild if needed
             
-            await self._save_vectorstore()
+            await self._mark_dirty()
             
             logger.info(f"Removed document '{filename}' from metadata")
             return True
@@ -360,6 +709,24 @@ Answer:"""
             logger.error(f"Error deleting document: {str(e)}")
             return False
     
+    async def delete_documents(self, filenames: List[str]) -> Dict[str, bool]:
+        """Delete several documents from the vector store with one metadata swap and save"""
+        deleted = {filename: filename in self.document_metadata for filename in filenames}
+        if not any(deleted.values()):
+            return deleted
+        
+        new_metadata = {
+            filename: metadata
+            for filename, metadata in self.document_metadata.items()
+            if not deleted.get(filename)
+        }
+        object.__setattr__(self, 'document_metadata', new_metadata)
+        
+        await self._mark_dirty()
+        
+        logger.info(f"Removed {sum(deleted.values())} documents from metadata")
+        return deleted
+    
     async def health_check(self) -> Dict[str, Any]:
         """Check health of the RAG tool"""
         return {
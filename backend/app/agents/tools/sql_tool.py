@@ -1,22 +1,224 @@
 from langchain.tools import BaseTool
 from typing import Dict, List, Any, Optional
 import sqlite3
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use('Agg')  # Charts are rendered off the main thread, never shown
+import matplotlib.style
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import seaborn as sns
 import matplotlib.dates as mdates
-from datetime import datetime, timedelta
 import os
 import json
 import logging
 import io
+import re
 import base64
+import asyncio
+import threading
+from collections import OrderedDict
+
+try:
+    import aiosqlite
+except ImportError:  # Fall back to sqlite3 in a worker thread
+    aiosqlite = None
+
+try:
+    from numba import njit
+except ImportError:  # Fall back to plain numpy reductions
+    njit = None
 
 from app.llm.factory import create_llm
 from app.config import config
+from app.agents.tools.event_loop import run_sync
+from app.services.chart_store import store_chart
 
 logger = logging.getLogger(__name__)
 
+# Connection tuning for bulk writes: WAL avoids a full journal rewrite per commit,
+# and NORMAL sync only fsyncs at checkpoints
+_PRAGMA_SQL = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-65536;
+"""
+
+# Explicit chart requests, checked in order
+_CHART_KEYWORDS = {
+    'bar': ('bar chart', 'barchart'),
+    'pie': ('pie chart', 'piechart'),
+    'line': ('line chart', 'linechart', 'trend'),
+    'scatter': ('scatter plot', 'scatterplot')
+}
+
+# Wording that asks for a visual; small results without it are answered in text only
+_CHART_TRIGGERS = re.compile(r'\b(chart|plot|graph|trend|compare|distribution|visuali[sz]|show me)', re.I)
+
+# Statements kept compiled per connection; repeated dashboard queries skip re-parse/re-plan
+_STATEMENT_CACHE_SIZE = 256
+
+def _normalize_sql(sql_query: str) -> str:
+    """Trim LLM output to a stable statement text so it hits sqlite's statement cache"""
+    return sql_query.strip().rstrip(';').strip()
+
+def _full_scans(plan: List[tuple]) -> List[str]:
+    """Table scans in an EXPLAIN QUERY PLAN result that no index helps with"""
+    return [
+        row[-1] for row in plan
+        if row[-1].startswith('SCAN ') and 'USING' not in row[-1]
+    ]
+
+def _is_date_name(column: str) -> bool:
+    return 'date' in column.lower() or 'time' in column.lower()
+
+class _ParsedDates(dict):
+    """Parsed date columns kept on df.attrs; shared, not copied, by derived frames"""
+    
+    def __deepcopy__(self, memo):
+        return self
+
+def _parse_date_columns(df: pd.DataFrame):
+    """Parse date-named text columns once per result, so chart builds don't re-parse
+    them. The frame keeps SQLite's original strings for the response payload; the
+    parsed series live on df.attrs. Columns that aren't cleanly ISO dates are skipped."""
+    parsed_dates = _ParsedDates()
+    for col in df.columns:
+        if _is_date_name(col) and pd.api.types.is_object_dtype(df[col]):
+            parsed = pd.to_datetime(df[col], errors='coerce', format='ISO8601')
+            if parsed.notna().sum() == df[col].notna().sum():
+                parsed_dates[col] = parsed
+    df.attrs['parsed_dates'] = parsed_dates
+
+def _classify_columns(df: pd.DataFrame):
+    """Split DataFrame columns into numeric, string and date-like names
+
+    The split is cached on df.attrs, keyed by the column names so frames derived
+    with a different shape don't reuse it.
+    """
+    cached = df.attrs.get('col_classes')
+    if cached is not None and cached[0] == tuple(df.columns):
+        return cached[1]
+    
+    dtypes = df.dtypes
+    classes = (
+        dtypes.index[dtypes.isin([np.dtype('int64'), np.dtype('float64')])].tolist(),
+        [col for col, dtype in dtypes.items() if pd.api.types.is_string_dtype(dtype)],
+        [col for col in df.columns if _is_date_name(col)]
+    )
+    df.attrs['col_classes'] = (tuple(df.columns), classes)
+    return classes
+
+def _colstats_numpy(a: np.ndarray):
+    """Mean, max and min of a NaN-free float array"""
+    return a.mean(), a.max(), a.min()
+
+if njit is not None:
+    @njit(cache=True)
+    def _colstats(a):
+        """Mean, max and min of a NaN-free float array in one sweep"""
+        n = a.size
+        s = 0.0
+        mx = -np.inf
+        mn = np.inf
+        for i in range(n):
+            v = a[i]
+            s += v
+            if v > mx:
+                mx = v
+            if v < mn:
+                mn = v
+        return s / n, mx, mn
+else:
+    _colstats = _colstats_numpy
+
+def _lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Pick indices of n_out points that keep the visual shape of a sorted series
+    (Largest-Triangle-Three-Buckets)"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    # First and last points are always kept; the rest are split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    
+    anchor = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        
+        # Average of the next bucket, or the last point for the final bucket
+        if i + 2 < len(edges):
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        
+        # Keep the point forming the largest triangle with the previous pick and that average
+        areas = np.abs(
+            (x[anchor] - next_x) * (y[start:end] - y[anchor])
+            - (x[anchor] - x[start:end]) * (next_y - y[anchor])
+        )
+        anchor = start + int(np.argmax(areas))
+        selected[i + 1] = anchor
+    
+    return selected
+
+# Chart styles parsed once at import instead of on every chart
+_STYLES = {
+    name: matplotlib.style.library[name]
+    for name in ('seaborn-v0_8-darkgrid', 'seaborn-v0_8-pastel')
+}
+
+# rc_context swaps matplotlib's global rcParams, so chart rendering threads take turns
+_PLOT_LOCK = threading.Lock()
+
+# Stored in PRAGMA user_version once schema, indexes and sample data are in place
+_SAMPLE_DATA_VERSION = 1
+
+_INDEX_SQL = """
+    CREATE INDEX IF NOT EXISTS ix_sales_customer ON sales(customer_id);
+    CREATE INDEX IF NOT EXISTS ix_sales_product ON sales(product_id);
+    CREATE INDEX IF NOT EXISTS ix_sales_date ON sales(sale_date);
+    CREATE INDEX IF NOT EXISTS ix_cust_tier ON customers(tier);
+    CREATE INDEX IF NOT EXISTS ix_prod_category ON products(category);
+"""
+
+# Database schema context
+_SCHEMA_CONTEXT = """
+Available tables and their schemas:
+
+1. customers (customer_id, name, email, tier [Basic/Premium/Enterprise], signup_date, country)
+2. products (product_id, name, category [Software/Service], price, cost, launch_date)  
+3. sales (sale_id, customer_id, product_id, quantity, unit_price, total_amount, sale_date, region)
+4. campaigns (campaign_id, name, start_date, end_date, budget, spend, impressions, clicks, conversions)
+
+Key relationships:
+- sales.customer_id → customers.customer_id
+- sales.product_id → products.product_id
+"""
+
+_SQL_PROMPT_TEMPLATE = """Given the following database schema and user query, generate a SQL query that will answer the user's question.
+
+{schema}
+
+User Query: {query}
+
+Guidelines:
+- Use proper SQL syntax for SQLite
+- Include relevant JOINs when needed
+- Use appropriate aggregations (SUM, COUNT, AVG, etc.)
+- Add ORDER BY for rankings
+- Use LIMIT for top/bottom queries
+- Calculate profit as (price - cost) * quantity where relevant
+- For date queries, use DATE() function
+- For monthly/quarterly analysis, use strftime() function
+
+Return only the SQL query without any explanations:"""
+
 class SQLTool(BaseTool):
     """Tool for SQL analytics and business intelligence with chart generation"""
     
@@ -47,6 +249,10 @@ class SQLTool(BaseTool):
         super().__init__(**kwargs)
         object.__setattr__(self, 'db_path', None)
         object.__setattr__(self, 'llm', None)
+        object.__setattr__(self, '_sql_cache', OrderedDict())
+        object.__setattr__(self, '_planned', OrderedDict())
+        object.__setattr__(self, '_planned_lock', threading.Lock())
+        object.__setattr__(self, '_conn', None)
         
     async def initialize(self):
         """Initialize the SQL tool with database and sample data"""
@@ -61,12 +267,27 @@ class SQLTool(BaseTool):
             # Ensure database exists with sample data
             await self._ensure_sample_data()
             
+            # Compile (or load the cached) numba kernel now, not inside a query
+            await asyncio.to_thread(_colstats, np.zeros(1))
+            
+            # Keep one connection open so its page cache stays warm between queries
+            if aiosqlite is not None:
+                conn = await aiosqlite.connect(db_path, cached_statements=_STATEMENT_CACHE_SIZE)
+                await conn.executescript(_PRAGMA_SQL)
+                object.__setattr__(self, '_conn', conn)
+            
             logger.info("SQL tool initialized successfully")
             
         except Exception as e:
             logger.error(f"Error initializing SQL tool: {str(e)}")
             raise
     
+    async def close(self):
+        """Close the persistent database connection"""
+        if self._conn is not None:
+            await self._conn.close()
+            object.__setattr__(self, '_conn', None)
+    
     async def _ensure_sample_data(self):
         """Create database and populate with sample business data"""
         try:
@@ -75,6 +296,14 @@ class SQLTool(BaseTool):
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
+                # A stamped database already has its schema, indexes and data
+                cursor.execute("PRAGMA user_version")
+                if cursor.fetchone()[0] >= _SAMPLE_DATA_VERSION:
+                    logger.info("Sample data already present in database")
+                    return
+                
+                cursor.executescript(_PRAGMA_SQL)
+                
                 # Create tables
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS customers (
@@ -127,12 +356,23 @@ class SQLTool(BaseTool):
                     )
                 """)
                 
-                # Check if data already exists
-                cursor.execute("SELECT COUNT(*) FROM customers")
-                if cursor.fetchone()[0] == 0:
+                # Index the join and filter columns analytics queries hit most
+                cursor.executescript(_INDEX_SQL)
+                
+                # Check if data already exists (without counting every row)
+                cursor.execute("SELECT 1 FROM customers LIMIT 1")
+                if cursor.fetchone() is None:
+                    # Insert everything in one transaction so there is a single commit
+                    cursor.execute("BEGIN")
                     await self._populate_sample_data(cursor)
                 
                 conn.commit()
+                
+                # Refresh planner statistics so the indexes are used
+                cursor.execute("ANALYZE")
+                
+                # Stamp the database so later startups skip this setup
+                cursor.execute(f"PRAGMA user_version = {_SAMPLE_DATA_VERSION}")
                 logger.info("Sample data ensured in database")
                 
         except Exception as e:
@@ -178,35 +418,34 @@ class SQLTool(BaseTool):
             VALUES (?, ?, ?, ?, ?, ?)
         """, products)
         
-        # Generate comprehensive sales data (500 records)
-        import random
-        from datetime import date, timedelta
+        # Generate comprehensive sales data (500 records), drawing every column at once
+        n_sales = 500
+        rng = np.random.default_rng(0)
+        regions = np.array(["North America", "Europe", "Asia-Pacific", "Latin America"])
+        product_prices = np.array([299.99, 99.99, 599.99, 199.99, 150.00, 49.99, 999.99, 299.99])
         
-        sales_data = []
-        base_date = date(2023, 1, 1)
-        regions = ["North America", "Europe", "Asia-Pacific", "Latin America"]
+        customer_ids = rng.integers(1, 11, n_sales)
+        product_ids = rng.integers(1, 9, n_sales)
+        quantities = rng.integers(1, 11, n_sales)
         
-        for i in range(1, 501):
-            customer_id = random.randint(1, 10)
-            product_id = random.randint(1, 8)
-            quantity = random.randint(1, 10)
-            
-            # Get product price
-            product_prices = {1: 299.99, 2: 99.99, 3: 599.99, 4: 199.99, 5: 150.00, 6: 49.99, 7: 999.99, 8: 299.99}
-            unit_price = product_prices[product_id]
-            
-            # Add some price variation
-            unit_price *= random.uniform(0.9, 1.1)
-            total_amount = quantity * unit_price
-            
-            # Random date in 2023
-            days_offset = random.randint(0, 300)
-            sale_date = base_date + timedelta(days=days_offset)
-            
-            region = random.choice(regions)
-            
-            sales_data.append((i, customer_id, product_id, quantity, round(unit_price, 2), 
-                             round(total_amount, 2), sale_date.strftime("%Y-%m-%d"), region))
+        # Add some price variation
+        unit_prices = product_prices[product_ids - 1] * rng.uniform(0.9, 1.1, n_sales)
+        total_amounts = quantities * unit_prices
+        
+        # Random date in 2023
+        sale_dates = (np.datetime64("2023-01-01") + rng.integers(0, 301, n_sales).astype("timedelta64[D]")).astype(str)
+        sale_regions = regions[rng.integers(0, len(regions), n_sales)]
+        
+        sales_data = list(zip(
+            range(1, n_sales + 1),
+            customer_ids.tolist(),
+            product_ids.tolist(),
+            quantities.tolist(),
+            np.round(unit_prices, 2).tolist(),
+            np.round(total_amounts, 2).tolist(),
+            sale_dates.tolist(),
+            sale_regions.tolist()
+        ))
         
         cursor.executemany("""
             INSERT INTO sales (sale_id, customer_id, product_id, quantity, unit_price, total_amount, sale_date, region)
@@ -228,8 +467,7 @@ class SQLTool(BaseTool):
     
     def _run(self, query: str) -> Dict[str, Any]:
         """Synchronous run method (required by BaseTool)"""
-        import asyncio
-        return asyncio.run(self._arun(query))
+        return run_sync(self._arun(query))
     
     async def _arun(self, query: str) -> Dict[str, Any]:
         """Analyze business data based on natural language query"""
@@ -255,14 +493,19 @@ class SQLTool(BaseTool):
             results = await self._execute_query(sql_query)
             
             if results["success"]:
-                # Generate analysis and charts
-                analysis = await self._analyze_results(query, results["data"], sql_query)
-                charts = await self._generate_charts(query, results["data"])
+                df = results["df"]
+                
+                # Generate analysis and charts concurrently; they only share the read-only
+                # results, and rendering runs in a thread while the LLM call is in flight
+                analysis, charts = await asyncio.gather(
+                    self._analyze_results(query, df, sql_query),
+                    asyncio.to_thread(self._generate_charts, query, df)
+                )
                 
                 return {
                     "answer": analysis,
                     "charts": charts,
-                    "data": results["data"][:20],  # Limit data returned
+                    "data": self._to_records(df.head(20)),  # Limit data returned
                     "sql_query": sql_query
                 }
             else:
@@ -283,37 +526,13 @@ class SQLTool(BaseTool):
     async def _generate_sql_query(self, query: str) -> str:
         """Generate SQL query from natural language using LLM"""
         try:
-            # Database schema context
-            schema_context = """
-Available tables and their schemas:
-
-1. customers (customer_id, name, email, tier [Basic/Premium/Enterprise], signup_date, country)
-2. products (product_id, name, category [Software/Service], price, cost, launch_date)  
-3. sales (sale_id, customer_id, product_id, quantity, unit_price, total_amount, sale_date, region)
-4. campaigns (campaign_id, name, start_date, end_date, budget, spend, impressions, clicks, conversions)
-
-Key relationships:
-- sales.customer_id → customers.customer_id
-- sales.product_id → products.product_id
-"""
+            cache_key = " ".join(query.lower().split())
+            cached = self._sql_cache.get(cache_key)
+            if cached is not None:
+                self._sql_cache.move_to_end(cache_key)
+                return cached
             
-            prompt = f"""Given the following database schema and user query, generate a SQL query that will answer the user's question.
-
-{schema_context}
-
-User Query: {query}
-
-Guidelines:
-- Use proper SQL syntax for SQLite
-- Include relevant JOINs when needed
-- Use appropriate aggregations (SUM, COUNT, AVG, etc.)
-- Add ORDER BY for rankings
-- Use LIMIT for top/bottom queries
-- Calculate profit as (price - cost) * quantity where relevant
-- For date queries, use DATE() function
-- For monthly/quarterly analysis, use strftime() function
-
-Return only the SQL query without any explanations:"""
+            prompt = _SQL_PROMPT_TEMPLATE.format(schema=_SCHEMA_CONTEXT, query=query)
 
             # Get response from LLM
             if hasattr(self.llm, 'ainvoke'):
@@ -328,70 +547,117 @@ Return only the SQL query without any explanations:"""
                 sql_query = sql_query[6:]
             if sql_query.endswith('```'):
                 sql_query = sql_query[:-3]
+            sql_query = sql_query.strip()
+            
+            # Remember the SQL for repeated business questions
+            if sql_query:
+                self._sql_cache[cache_key] = sql_query
+                if len(self._sql_cache) > config.SQL_QUERY_CACHE_SIZE:
+                    self._sql_cache.popitem(last=False)
             
-            return sql_query.strip()
+            return sql_query
             
         except Exception as e:
             logger.error(f"Error generating SQL query: {str(e)}")
             return ""
     
     async def _execute_query(self, sql_query: str) -> Dict[str, Any]:
-        """Execute SQL query and return results"""
+        """Execute SQL query and return results as a DataFrame"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                # Enable row factory for dict-like access
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                
-                cursor.execute(sql_query)
-                rows = cursor.fetchall()
-                
-                # Convert to list of dictionaries
-                data = [dict(row) for row in rows]
-                
-                return {
-                    "success": True,
-                    "data": data,
-                    "row_count": len(data)
-                }
+            df = await self._fetch(sql_query)
+            _parse_date_columns(df)
+            _classify_columns(df)
+            
+            return {
+                "success": True,
+                "df": df,
+                "row_count": len(df)
+            }
                 
         except Exception as e:
             logger.error(f"Error executing SQL query: {str(e)}")
             return {
                 "success": False,
                 "error": str(e),
-                "data": []
+                "df": pd.DataFrame()
             }
     
-    async def _analyze_results(self, original_query: str, data: List[Dict], sql_query: str) -> str:
+    async def _fetch(self, sql_query: str) -> pd.DataFrame:
+        """Run a query on the persistent connection, or a fresh one without aiosqlite"""
+        sql_query = _normalize_sql(sql_query)
+        if self._conn is None:
+            return await asyncio.to_thread(self._fetch_sync, sql_query)
+        
+        # EXPLAIN is a separate statement with its own prepare, so only check the
+        # plan the first time a statement is seen; repeats go straight to the cache
+        if self._first_sighting(sql_query):
+            async with self._conn.execute(f"EXPLAIN QUERY PLAN {sql_query}") as cursor:
+                self._check_plan(sql_query, await cursor.fetchall())
+        
+        async with self._conn.execute(sql_query) as cursor:
+            rows = await cursor.fetchall()
+            columns = [column[0] for column in cursor.description or []]
+        return pd.DataFrame.from_records(rows, columns=columns)
+    
+    def _fetch_sync(self, sql_query: str) -> pd.DataFrame:
+        """Run a query on a new sqlite3 connection (blocking)"""
+        with sqlite3.connect(self.db_path, cached_statements=_STATEMENT_CACHE_SIZE) as conn:
+            if self._first_sighting(sql_query):
+                self._check_plan(sql_query, conn.execute(f"EXPLAIN QUERY PLAN {sql_query}").fetchall())
+            # Fetch straight into columns rather than building a dict per row
+            return pd.read_sql_query(sql_query, conn)
+    
+    def _first_sighting(self, sql_query: str) -> bool:
+        """Record a normalized statement, returning True if it had not been seen recently"""
+        with self._planned_lock:
+            if sql_query in self._planned:
+                self._planned.move_to_end(sql_query)
+                return False
+            self._planned[sql_query] = None
+            if len(self._planned) > _STATEMENT_CACHE_SIZE:
+                self._planned.popitem(last=False)
+            return True
+    
+    @staticmethod
+    def _check_plan(sql_query: str, plan: List[tuple]):
+        """Warn about full table scans in a query plan"""
+        scans = _full_scans(plan)
+        if scans:
+            logger.warning(f"Query runs unindexed scans ({'; '.join(scans)}): {sql_query}")
+    
+    @staticmethod
+    def _to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Convert a DataFrame to JSON-safe records, mapping NaN back to None"""
+        present = df.notna()
+        return df.astype(object).where(present, None).to_dict(orient="records")
+    
+    async def _analyze_results(self, original_query: str, df: pd.DataFrame, sql_query: str) -> str:
         """Generate analysis of the query results"""
         try:
-            if not data:
+            if df.empty:
                 return "No data found matching your criteria."
             
             # Create data summary
-            data_summary = f"Found {len(data)} records. "
+            data_summary = f"Found {len(df)} records. "
             
-            if len(data) > 0:
+            if len(df) > 0:
                 # Sample some key insights
-                first_row = data[0]
-                columns = list(first_row.keys())
+                columns = list(df.columns)
                 
                 # Add column information
                 data_summary += f"Data includes: {', '.join(columns[:5])}{'...' if len(columns) > 5 else ''}. "
                 
                 # Add some basic statistics for numeric columns
                 numeric_insights = []
-                for col in columns:
-                    try:
-                        values = [float(row[col]) for row in data if row[col] is not None and str(row[col]).replace('.', '').replace('-', '').isdigit()]
-                        if values:
-                            avg_val = sum(values) / len(values)
-                            max_val = max(values)
-                            min_val = min(values)
-                            numeric_insights.append(f"{col}: avg {avg_val:.2f}, max {max_val:.2f}, min {min_val:.2f}")
-                    except:
+                for col in df.select_dtypes(include='number').columns:
+                    values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                    values = values[~np.isnan(values)]
+                    if not values.size:
                         continue
+                    mean, max_val, min_val = _colstats(values)
+                    numeric_insights.append(f"{col}: avg {mean:.2f}, max {max_val:.2f}, min {min_val:.2f}")
+                    if len(numeric_insights) == 3:
+                        break
                 
                 if numeric_insights:
                     data_summary += f"Key metrics: {'; '.join(numeric_insights[:3])}."
@@ -402,7 +668,7 @@ Return only the SQL query without any explanations:"""
 Original Query: {original_query}
 SQL Query Used: {sql_query}
 Results Summary: {data_summary}
-Sample Data: {str(data[:3]) if len(data) > 0 else 'No data'}
+Sample Data: {str(self._to_records(df.head(3))) if len(df) > 0 else 'No data'}
 
 Provide a business-focused analysis that:
 1. Directly answers the user's question
@@ -424,50 +690,44 @@ Provide a business-focused analysis that:
             logger.error(f"Error analyzing results: {str(e)}")
             return f"Analysis completed. {data_summary}"
     
-    async def _generate_charts(self, query: str, data: List[Dict]) -> List[Dict[str, Any]]:
-        """Generate charts based on query and data"""
+    def _generate_charts(self, query: str, df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Generate charts based on query and data (blocking, run in a worker thread)"""
         try:
-            if not data or len(data) < 2:
+            if len(df) < 2:
                 return []
             
-            # Convert to pandas DataFrame
-            df = pd.DataFrame(data)
-            
-            # Create output directory if it doesn't exist
-            os.makedirs(config.CHART_OUTPUT_DIR, exist_ok=True)
+            # Skip matplotlib entirely for lookups like "how many customers do we have?"
+            if not _CHART_TRIGGERS.search(query) and len(df) < 5:
+                return []
             
             charts = []
             
             # Determine chart types based on data and query
             chart_types = self._determine_chart_types(query, df)
+            chart_builders = {
+                'bar': self._create_bar_chart,
+                'line': self._create_time_series,
+                'pie': self._create_pie_chart,
+                'scatter': self._create_scatter_plot
+            }
             
             for chart_type, columns in chart_types:
                 try:
-                    chart_path = None
-                    
-                    if chart_type == "bar" and len(columns) >= 2:
-                        chart_path = await self._create_bar_chart(df, columns[0], columns[1], config.CHART_OUTPUT_DIR)
+                    with _PLOT_LOCK:
+                        png_bytes = chart_builders[chart_type](df, *columns)
                     
-                    elif chart_type == "line" and len(columns) >= 2:
-                        chart_path = await self._create_time_series(df, columns[0], columns[1], config.CHART_OUTPUT_DIR)
-                    
-                    elif chart_type == "pie" and len(columns) >= 1:
-                        chart_path = await self._create_pie_chart(df, columns[0], config.CHART_OUTPUT_DIR)
-                    
-                    elif chart_type == "scatter" and len(columns) >= 2:
-                        chart_path = await self._create_scatter_plot(df, columns[0], columns[1], config.CHART_OUTPUT_DIR)
-                    
-                    if chart_path:
-                        # Convert the chart to base64 for frontend display
-                        with open(chart_path, "rb") as image_file:
-                            base64_image = base64.b64encode(image_file.read()).decode("utf-8")
-                        
-                        charts.append({
+                    if png_bytes:
+                        # Serve the PNG by URL from the on-disk chart store; base64 is only inlined for older clients
+                        chart_id = store_chart(png_bytes)
+                        chart = {
+                            "id": chart_id,
                             "type": chart_type,
                             "title": f"{chart_type.title()} Chart: {columns[0]} vs {columns[1]}" if len(columns) > 1 else f"{chart_type.title()} Chart: {columns[0]}",
-                            "image_path": chart_path,
-                            "base64": base64_image
-                        })
+                            "image_url": f"/api/charts/{chart_id}"
+                        }
+                        if config.CHART_INLINE_BASE64:
+                            chart["base64"] = base64.b64encode(png_bytes).decode("utf-8")
+                        charts.append(chart)
                 
                 except Exception as e:
                     logger.error(f"Error creating {chart_type} chart: {str(e)}")
@@ -478,243 +738,221 @@ Provide a business-focused analysis that:
             logger.error(f"Error generating charts: {str(e)}")
             return []
     
-    async def _create_bar_chart(self, df: pd.DataFrame, x_col: str, y_col: str, output_dir: str) -> Optional[str]:
+    @staticmethod
+    def _new_figure():
+        """Create a figure on its own Agg canvas, outside pyplot's global state"""
+        fig = Figure(figsize=config.CHART_FIGSIZE)
+        FigureCanvasAgg(fig)
+        return fig, fig.add_subplot(111)
+    
+    @staticmethod
+    def _render_png(fig: Figure, **savefig_kwargs) -> bytes:
+        """Render a figure to PNG bytes in memory"""
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=config.CHART_DPI, **savefig_kwargs)
+        return buffer.getvalue()
+    
+    def _create_bar_chart(self, df: pd.DataFrame, x_col: str, y_col: str) -> Optional[bytes]:
         """Create a bar chart"""
         try:
-            # Set style
-            plt.style.use('seaborn-v0_8-darkgrid')
-            
-            # Create figure
-            fig, ax = plt.subplots(figsize=config.CHART_FIGSIZE)
-            
-            # Create bar chart
-            sns.barplot(data=df, x=x_col, y=y_col, ax=ax, palette='viridis')
-            
-            # Customize appearance
-            ax.set_title(f'{y_col} by {x_col}', fontsize=16, pad=20)
-            ax.set_xlabel(x_col, fontsize=12, labelpad=10)
-            ax.set_ylabel(y_col, fontsize=12, labelpad=10)
-            
-            # Rotate x labels if there are many categories
-            if len(df[x_col].unique()) > 5:
-                plt.xticks(rotation=45, ha='right')
-            
-            # Tight layout
-            plt.tight_layout()
-            
-            # Save chart
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"bar_chart_{timestamp}.png"
-            filepath = os.path.join(output_dir, filename)
-            plt.savefig(filepath, dpi=config.CHART_DPI)
-            plt.close()
-            
-            return filepath
+            with matplotlib.rc_context(_STYLES['seaborn-v0_8-darkgrid']):
+                # Create figure
+                fig, ax = self._new_figure()
+                
+                # Create bar chart
+                sns.barplot(data=df, x=x_col, y=y_col, ax=ax, palette='viridis')
+                
+                # Customize appearance
+                ax.set_title(f'{y_col} by {x_col}', fontsize=16, pad=20)
+                ax.set_xlabel(x_col, fontsize=12, labelpad=10)
+                ax.set_ylabel(y_col, fontsize=12, labelpad=10)
+                
+                # Rotate x labels if there are many categories
+                if len(df[x_col].unique()) > 5:
+                    ax.tick_params(axis='x', labelrotation=45)
+                    for label in ax.get_xticklabels():
+                        label.set_horizontalalignment('right')
+                
+                # Tight layout
+                fig.tight_layout()
+                
+                return self._render_png(fig)
             
         except Exception as e:
             logger.error(f"Error creating bar chart: {str(e)}")
-            plt.close()
             return None
     
-    async def _create_scatter_plot(self, df: pd.DataFrame, x_col: str, y_col: str, output_dir: str) -> Optional[str]:
+    def _create_scatter_plot(self, df: pd.DataFrame, x_col: str, y_col: str) -> Optional[bytes]:
         """Create a scatter plot"""
         try:
-            # Set style
-            plt.style.use('seaborn-v0_8-darkgrid')
-            
-            # Create figure
-            fig, ax = plt.subplots(figsize=config.CHART_FIGSIZE)
-            
-            # Create scatter plot
-            sns.scatterplot(data=df, x=x_col, y=y_col, ax=ax, alpha=0.7)
-            
-            # Add trend line
-            sns.regplot(data=df, x=x_col, y=y_col, scatter=False, ax=ax, line_kws={"color": "red"})
-            
-            # Customize appearance
-            ax.set_title(f'{y_col} vs {x_col}', fontsize=16, pad=20)
-            ax.set_xlabel(x_col, fontsize=12, labelpad=10)
-            ax.set_ylabel(y_col, fontsize=12, labelpad=10)
-            
-            # Tight layout
-            plt.tight_layout()
-            
-            # Save chart
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"scatter_plot_{timestamp}.png"
-            filepath = os.path.join(output_dir, filename)
-            plt.savefig(filepath, dpi=config.CHART_DPI)
-            plt.close()
-            
-            return filepath
+            with matplotlib.rc_context(_STYLES['seaborn-v0_8-darkgrid']):
+                # Create figure
+                fig, ax = self._new_figure()
+                
+                # Plotting every marker of a large result adds nothing visible
+                if len(df) > config.CHART_MAX_POINTS:
+                    df = df.sample(n=config.CHART_MAX_POINTS, random_state=0)
+                
+                # Create scatter plot
+                sns.scatterplot(data=df, x=x_col, y=y_col, ax=ax, alpha=0.7)
+                
+                # Add trend line
+                sns.regplot(data=df, x=x_col, y=y_col, scatter=False, ax=ax, line_kws={"color": "red"})
+                
+                # Customize appearance
+                ax.set_title(f'{y_col} vs {x_col}', fontsize=16, pad=20)
+                ax.set_xlabel(x_col, fontsize=12, labelpad=10)
+                ax.set_ylabel(y_col, fontsize=12, labelpad=10)
+                
+                # Tight layout
+                fig.tight_layout()
+                
+                return self._render_png(fig)
             
         except Exception as e:
             logger.error(f"Error creating scatter plot: {str(e)}")
-            plt.close()
             return None
     
-    async def _create_time_series(self, df: pd.DataFrame, date_col: str, value_col: str, output_dir: str) -> Optional[str]:
+    def _create_time_series(self, df: pd.DataFrame, date_col: str, value_col: str) -> Optional[bytes]:
         """Create a time series chart"""
         try:
-            # Set style
-            plt.style.use('seaborn-v0_8-darkgrid')
-            
-            # Create figure
-            fig, ax = plt.subplots(figsize=config.CHART_FIGSIZE)
-            
-            # Convert date column to datetime if it's not already
-            if not pd.api.types.is_datetime64_any_dtype(df[date_col]):
-                df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-            
-            # Sort by date
-            df = df.sort_values(by=date_col)
-            
-            # Plot time series
-            sns.lineplot(data=df, x=date_col, y=value_col, marker='o', ax=ax)
-            
-            # Format x-axis dates
-            ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-            plt.xticks(rotation=45, ha='right')
-            
-            # Customize appearance
-            ax.set_title(f'{value_col} Over Time', fontsize=16, pad=20)
-            ax.set_xlabel('Date', fontsize=12, labelpad=10)
-            ax.set_ylabel(value_col, fontsize=12, labelpad=10)
-            
-            # Add grid
-            ax.grid(True, linestyle='--', alpha=0.7)
-            
-            # Tight layout
-            plt.tight_layout()
-            
-            # Save chart
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"time_series_{timestamp}.png"
-            filepath = os.path.join(output_dir, filename)
-            plt.savefig(filepath, dpi=config.CHART_DPI)
-            plt.close()
-            
-            return filepath
+            with matplotlib.rc_context(_STYLES['seaborn-v0_8-darkgrid']):
+                # Create figure
+                fig, ax = self._new_figure()
+                
+                # Convert date column to datetime if it's not already (on a copy, the
+                # frame is shared with the other charts and the response payload),
+                # reusing the series parsed when the query ran
+                if not pd.api.types.is_datetime64_any_dtype(df[date_col]):
+                    parsed = df.attrs.get('parsed_dates', {}).get(date_col)
+                    if parsed is None:
+                        parsed = pd.to_datetime(df[date_col], errors='coerce')
+                    df = df.assign(**{date_col: parsed})
+                
+                # Sort by date
+                df = df.sort_values(by=date_col)
+                
+                # Downsample long series while keeping their peaks and troughs
+                if len(df) > config.CHART_MAX_POINTS:
+                    df = df.dropna(subset=[date_col, value_col])
+                    df = df.iloc[_lttb(
+                        df[date_col].to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64),
+                        df[value_col].to_numpy(dtype=np.float64),
+                        config.CHART_MAX_POINTS
+                    )]
+                
+                # Plot time series
+                sns.lineplot(data=df, x=date_col, y=value_col, marker='o', ax=ax)
+                
+                # Format x-axis dates
+                ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
+                ax.tick_params(axis='x', labelrotation=45)
+                for label in ax.get_xticklabels():
+                    label.set_horizontalalignment('right')
+                
+                # Customize appearance
+                ax.set_title(f'{value_col} Over Time', fontsize=16, pad=20)
+                ax.set_xlabel('Date', fontsize=12, labelpad=10)
+                ax.set_ylabel(value_col, fontsize=12, labelpad=10)
+                
+                # Add grid
+                ax.grid(True, linestyle='--', alpha=0.7)
+                
+                # Tight layout
+                fig.tight_layout()
+                
+                return self._render_png(fig)
             
         except Exception as e:
             logger.error(f"Error creating time series chart: {str(e)}")
-            plt.close()
             return None
     
-    async def _create_pie_chart(self, df: pd.DataFrame, category_col: str, output_dir: str) -> Optional[str]:
+    def _create_pie_chart(self, df: pd.DataFrame, category_col: str) -> Optional[bytes]:
         """Create a pie chart"""
         try:
-            # Set style
-            plt.style.use('seaborn-v0_8-pastel')
-            
-            # Create figure
-            fig, ax = plt.subplots(figsize=config.CHART_FIGSIZE)
-            
-            # Get value counts for category column
-            counts = df[category_col].value_counts()
-            
-            # If too many categories, group smaller ones into "Other"
-            if len(counts) > 8:
-                top_counts = counts.head(7)
-                other_count = counts[7:].sum()
-                counts = pd.concat([top_counts, pd.Series({"Other": other_count})])
-            
-            # Create pie chart
-            wedges, texts, autotexts = ax.pie(
-                counts, 
-                labels=counts.index, 
-                autopct='%1.1f%%',
-                startangle=90,
-                shadow=False,
-                textprops={'fontsize': 10}
-            )
-            
-            # Equal aspect ratio ensures that pie is drawn as a circle
-            ax.axis('equal')
-            
-            # Add title
-            plt.title(f'Distribution by {category_col}', fontsize=16, pad=20)
-            
-            # Add legend
-            plt.legend(wedges, counts.index, title=category_col, loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
-            
-            # Tight layout
-            plt.tight_layout()
-            
-            # Save chart
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"pie_chart_{timestamp}.png"
-            filepath = os.path.join(output_dir, filename)
-            plt.savefig(filepath, dpi=config.CHART_DPI, bbox_inches='tight')
-            plt.close()
-            
-            return filepath
+            with matplotlib.rc_context(_STYLES['seaborn-v0_8-pastel']):
+                # Create figure
+                fig, ax = self._new_figure()
+                
+                # Get value counts for category column
+                counts = df[category_col].value_counts()
+                
+                # If too many categories, group smaller ones into "Other"
+                if len(counts) > 8:
+                    top_counts = counts.head(7)
+                    other_count = counts[7:].sum()
+                    counts = pd.concat([top_counts, pd.Series({"Other": other_count})])
+                
+                # Create pie chart
+                wedges, texts, autotexts = ax.pie(
+                    counts, 
+                    labels=counts.index, 
+                    autopct='%1.1f%%',
+                    startangle=90,
+                    shadow=False,
+                    textprops={'fontsize': 10}
+                )
+                
+                # Equal aspect ratio ensures that pie is drawn as a circle
+                ax.axis('equal')
+                
+                # Add title
+                ax.set_title(f'Distribution by {category_col}', fontsize=16, pad=20)
+                
+                # Add legend
+                ax.legend(wedges, counts.index, title=category_col, loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
+                
+                # Tight layout
+                fig.tight_layout()
+                
+                return self._render_png(fig, bbox_inches='tight')
             
         except Exception as e:
             logger.error(f"Error creating pie chart: {str(e)}")
-            plt.close()
             return None
     
     def _determine_chart_types(self, query: str, df: pd.DataFrame) -> List[tuple]:
         """Determine appropriate chart types and columns based on data and query"""
-        chart_types = []
-        
         # Identify column types
-        numeric_cols = df.select_dtypes(include=['int64', 'float64']).columns.tolist()
-        string_cols = df.select_dtypes(include=['object', 'string']).columns.tolist()
-        date_cols = [col for col in df.columns if 'date' in col.lower() or 'time' in col.lower()]
-        
-        # Match query keywords to chart types
-        query_lower = query.lower()
+        numeric_cols, string_cols, date_cols = _classify_columns(df)
         
-        # Check for explicit chart requests
-        if 'bar chart' in query_lower or 'barchart' in query_lower:
-            if string_cols and numeric_cols:
-                chart_types.append(('bar', [string_cols[0], numeric_cols[0]]))
-                
-        elif 'pie chart' in query_lower or 'piechart' in query_lower:
-            if string_cols:
-                chart_types.append(('pie', [string_cols[0]]))
-                
-        elif 'line chart' in query_lower or 'linechart' in query_lower or 'trend' in query_lower:
-            if date_cols and numeric_cols:
-                chart_types.append(('line', [date_cols[0], numeric_cols[0]]))
-                
-        elif 'scatter plot' in query_lower or 'scatterplot' in query_lower:
-            if len(numeric_cols) >= 2:
-                chart_types.append(('scatter', [numeric_cols[0], numeric_cols[1]]))
+        # Columns each chart type would use, or None if the data can't support it
+        chart_columns = {
+            'bar': [string_cols[0], numeric_cols[0]] if string_cols and numeric_cols else None,
+            'pie': [string_cols[0]] if string_cols else None,
+            'line': [date_cols[0], numeric_cols[0]] if date_cols and numeric_cols else None,
+            'scatter': [numeric_cols[0], numeric_cols[1]] if len(numeric_cols) >= 2 else None
+        }
         
-        # If no explicit chart type mentioned, suggest based on data
-        if not chart_types:
-            # For time series data
-            if date_cols and numeric_cols:
-                chart_types.append(('line', [date_cols[0], numeric_cols[0]]))
-            
-            # For categorical vs numeric data
-            if string_cols and numeric_cols:
-                chart_types.append(('bar', [string_cols[0], numeric_cols[0]]))
-            
-            # For distributions of categorical data
-            if string_cols and len(df) <= 20:
-                chart_types.append(('pie', [string_cols[0]]))
-            
-            # For numeric vs numeric data
-            if len(numeric_cols) >= 2:
-                chart_types.append(('scatter', [numeric_cols[0], numeric_cols[1]]))
+        # Check for explicit chart requests; the first matching type wins
+        query_lower = query.lower()
+        requested = next(
+            (
+                chart_type for chart_type, keywords in _CHART_KEYWORDS.items()
+                if any(keyword in query_lower for keyword in keywords)
+            ),
+            None
+        )
+        if requested and chart_columns[requested]:
+            return [(requested, chart_columns[requested])]
         
-        return chart_types
+        # If no explicit chart type mentioned, suggest based on data: time series,
+        # categorical vs numeric, small categorical distributions, numeric vs numeric
+        return [
+            (chart_type, chart_columns[chart_type])
+            for chart_type in ('line', 'bar', 'pie', 'scatter')
+            if chart_columns[chart_type] and (chart_type != 'pie' or len(df) <= 20)
+        ]
     
     async def health_check(self) -> Dict[str, Any]:
         """Check health of the SQL tool"""
         try:
             # Test database connection
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT COUNT(*) FROM customers")
-                customer_count = cursor.fetchone()[0]
-                
-                cursor.execute("SELECT COUNT(*) FROM sales")
-                sales_count = cursor.fetchone()[0]
+            counts = await self._fetch(
+                "SELECT (SELECT COUNT(*) FROM customers) AS customers, (SELECT COUNT(*) FROM sales) AS sales"
+            )
+            customer_count = int(counts.at[0, "customers"])
+            sales_count = int(counts.at[0, "sales"])
             
             return {
                 "status": "healthy",
@@ -3,10 +3,153 @@ from typing import Dict, List, Any, Optional
 import logging
 import asyncio
 import random
+import time
 from datetime import datetime, timedelta
 
+try:
+    import ahocorasick
+except ImportError:  # Fall back to plain substring checks
+    ahocorasick = None
+
+from app.agents.tools.event_loop import run_sync
+from app.config import config
+
 logger = logging.getLogger(__name__)
 
+# Keyword categories in priority order: when a query matches several, the first wins
+_CATEGORY_KEYWORDS = (
+    ("ai", ("ai", "artificial intelligence", "llm", "gpt", "machine learning")),
+    ("analytics", ("data analytics", "business intelligence", "dashboard", "visualization")),
+    ("finance", ("market", "stock", "finance", "economy", "investment")),
+    ("news", ("news", "current events", "latest", "breaking"))
+)
+
+# One automaton finds every keyword in a single pass over the query
+if ahocorasick is not None:
+    _KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _priority, (_, _keywords) in enumerate(_CATEGORY_KEYWORDS):
+        for _keyword in _keywords:
+            _KEYWORD_AUTOMATON.add_word(_keyword, _priority)
+    _KEYWORD_AUTOMATON.make_automaton()
+else:
+    _KEYWORD_AUTOMATON = None
+
+# Canned results per category; "published" holds each result's age, dated per request
+_RESULTS_BY_CATEGORY = {
+    "ai": [
+        {
+            "title": "Latest Advances in Large Language Models - AI Research Update",
+            "url": "https://example-ai-news.com/llm-advances-2024",
+            "snippet": "Recent breakthroughs in large language models show significant improvements in reasoning capabilities and multimodal understanding. New architectures are achieving better performance with fewer parameters.",
+            "domain": "AI Research",
+            "published": timedelta(days=2),
+            "relevance_score": 0.95
+        },
+        {
+            "title": "Enterprise AI Adoption Reaches New Heights in 2024",
+            "url": "https://example-tech-news.com/enterprise-ai-2024",
+            "snippet": "Companies are increasingly integrating AI tools into their workflows, with 78% of enterprises reporting successful AI implementations. The focus has shifted to practical applications and ROI measurement.",
+            "domain": "Technology News",
+            "published": timedelta(days=1),
+            "relevance_score": 0.88
+        },
+        {
+            "title": "Ethical AI Guidelines Updated by Leading Tech Companies",
+            "url": "https://example-ethics-news.com/ai-guidelines-update",
+            "snippet": "Major technology companies have released updated guidelines for responsible AI development, emphasizing transparency, fairness, and accountability in AI systems.",
+            "domain": "Tech Policy",
+            "published": timedelta(hours=12),
+            "relevance_score": 0.82
+        }
+    ],
+    "analytics": [
+        {
+            "title": "The Future of Business Intelligence: Real-Time Analytics Trends",
+            "url": "https://example-analytics.com/bi-trends-2024",
+            "snippet": "Real-time analytics and AI-powered insights are transforming how businesses make decisions. Self-service analytics tools are becoming more sophisticated and user-friendly.",
+            "domain": "Business Analytics",
+            "published": timedelta(days=3),
+            "relevance_score": 0.92
+        },
+        {
+            "title": "Data Visualization Best Practices for Modern Dashboards",
+            "url": "https://example-dataviz.com/dashboard-design-2024",
+            "snippet": "Modern dashboard design emphasizes clarity, interactivity, and mobile responsiveness. New tools are making it easier to create compelling data stories.",
+            "domain": "Data Visualization",
+            "published": timedelta(days=1),
+            "relevance_score": 0.86
+        }
+    ],
+    "finance": [
+        {
+            "title": "Global Markets Show Steady Growth Amid Tech Rally",
+            "url": "https://example-finance.com/market-update",
+            "snippet": "Technology stocks continue to drive market gains as investors show confidence in AI and cloud computing sectors. Market analysts remain optimistic about Q4 performance.",
+            "domain": "Financial News",
+            "published": timedelta(0),
+            "relevance_score": 0.94
+        },
+        {
+            "title": "Investment Trends: ESG and Technology Lead 2024",
+            "url": "https://example-investment.com/2024-trends",
+            "snippet": "Environmental, Social, and Governance (ESG) investments alongside technology sector investments are dominating portfolio allocations this year.",
+            "domain": "Investment News",
+            "published": timedelta(days=2),
+            "relevance_score": 0.87
+        }
+    ],
+    "news": [
+        {
+            "title": "Breaking: Major Technology Conference Announces Innovation Awards",
+            "url": "https://example-tech-news.com/innovation-awards",
+            "snippet": "The annual technology innovation conference has announced this year's award winners, highlighting breakthroughs in artificial intelligence, quantum computing, and sustainable technology.",
+            "domain": "Technology News",
+            "published": timedelta(hours=6),
+            "relevance_score": 0.91
+        },
+        {
+            "title": "Global Summit on Digital Transformation Concludes",
+            "url": "https://example-business.com/digital-summit",
+            "snippet": "World leaders and technology executives concluded a three-day summit on digital transformation, announcing new initiatives for global connectivity and digital literacy.",
+            "domain": "Business News",
+            "published": timedelta(hours=18),
+            "relevance_score": 0.85
+        }
+    ]
+}
+
+class _DateCache:
+    """Publish dates formatted once per minute, keyed by result age"""
+    
+    def __init__(self):
+        self._minute = None
+        self._dates = {}
+    
+    def get(self, age: timedelta) -> str:
+        minute = int(time.time() // 60)
+        if minute != self._minute:
+            self._minute = minute
+            self._dates = {}
+        
+        date = self._dates.get(age)
+        if date is None:
+            date = self._dates[age] = (datetime.now() - age).strftime("%Y-%m-%d")
+        return date
+
+_published_dates = _DateCache()
+
+def _classify_query(query: str) -> Optional[str]:
+    """Return the highest-priority keyword category found in the query, if any"""
+    text = query.lower()
+    if _KEYWORD_AUTOMATON is not None:
+        priorities = [priority for _, priority in _KEYWORD_AUTOMATON.iter(text)]
+    else:
+        priorities = [
+            priority for priority, (_, keywords) in enumerate(_CATEGORY_KEYWORDS)
+            if any(keyword in text for keyword in keywords)
+        ]
+    return _CATEGORY_KEYWORDS[min(priorities)][0] if priorities else None
+
 class WebTool(BaseTool):
     """Tool for web search and real-time information retrieval"""
     
@@ -38,8 +181,7 @@ class WebTool(BaseTool):
         
     def _run(self, query: str) -> Dict[str, Any]:
         """Synchronous run method (required by BaseTool)"""
-        import asyncio
-        return asyncio.run(self._arun(query))
+        return run_sync(self._arun(query))
     
     async def _arun(self, query: str) -> Dict[str, Any]:
         """Search the web for real-time information"""
@@ -69,121 +211,40 @@ class WebTool(BaseTool):
     async def _simulate_web_search(self, query: str) -> List[Dict[str, Any]]:
         """Simulate web search results with realistic content"""
         
-        # Simulate search delay
-        await asyncio.sleep(0.5)
+        # Simulate search delay (demo only, adds half a second to every call)
+        if config.WEB_TOOL_SIMULATE_LATENCY:
+            await asyncio.sleep(0.5)
         
         # Generate realistic search results based on query keywords
-        results = []
-        
-        if any(keyword in query.lower() for keyword in ["ai", "artificial intelligence", "llm", "gpt", "machine learning"]):
-            results = [
-                {
-                    "title": "Latest Advances in Large Language Models - AI Research Update",
-                    "url": "https://example-ai-news.com/llm-advances-2024",
-                    "snippet": "Recent breakthroughs in large language models show significant improvements in reasoning capabilities and multimodal understanding. New architectures are achieving better performance with fewer parameters.",
-                    "domain": "AI Research",
-                    "published": (datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d"),
-                    "relevance_score": 0.95
-                },
-                {
-                    "title": "Enterprise AI Adoption Reaches New Heights in 2024",
-                    "url": "https://example-tech-news.com/enterprise-ai-2024",
-                    "snippet": "Companies are increasingly integrating AI tools into their workflows, with 78% of enterprises reporting successful AI implementations. The focus has shifted to practical applications and ROI measurement.",
-                    "domain": "Technology News",
-                    "published": (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d"),
-                    "relevance_score": 0.88
-                },
-                {
-                    "title": "Ethical AI Guidelines Updated by Leading Tech Companies",
-                    "url": "https://example-ethics-news.com/ai-guidelines-update",
-                    "snippet": "Major technology companies have released updated guidelines for responsible AI development, emphasizing transparency, fairness, and accountability in AI systems.",
-                    "domain": "Tech Policy",
-                    "published": (datetime.now() - timedelta(hours=12)).strftime("%Y-%m-%d"),
-                    "relevance_score": 0.82
-                }
-            ]
-            
-        elif any(keyword in query.lower() for keyword in ["data analytics", "business intelligence", "dashboard", "visualization"]):
-            results = [
-                {
-                    "title": "The Future of Business Intelligence: Real-Time Analytics Trends",
-                    "url": "https://example-analytics.com/bi-trends-2024",
-                    "snippet": "Real-time analytics and AI-powered insights are transforming how businesses make decisions. Self-service analytics tools are becoming more sophisticated and user-friendly.",
-                    "domain": "Business Analytics",
-                    "published": (datetime.now() - timedelta(days=3)).strftime("%Y-%m-%d"),
-                    "relevance_score": 0.92
-                },
-                {
-                    "title": "Data Visualization Best Practices for Modern Dashboards",
-                    "url": "https://example-dataviz.com/dashboard-design-2024",
-                    "snippet": "Modern dashboard design emphasizes clarity, interactivity, and mobile responsiveness. New tools are making it easier to create compelling data stories.",
-                    "domain": "Data Visualization",
-                    "published": (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d"),
-                    "relevance_score": 0.86
-                }
-            ]
-            
-        elif any(keyword in query.lower() for keyword in ["market", "stock", "finance", "economy", "investment"]):
-            results = [
-                {
-                    "title": "Global Markets Show Steady Growth Amid Tech Rally",
-                    "url": "https://example-finance.com/market-update",
-                    "snippet": "Technology stocks continue to drive market gains as investors show confidence in AI and cloud computing sectors. Market analysts remain optimistic about Q4 performance.",
-                    "domain": "Financial News",
-                    "published": datetime.now().strftime("%Y-%m-%d"),
-                    "relevance_score": 0.94
-                },
-                {
-                    "title": "Investment Trends: ESG and Technology Lead 2024",
-                    "url": "https://example-investment.com/2024-trends",
-                    "snippet": "Environmental, Social, and Governance (ESG) investments alongside technology sector investments are dominating portfolio allocations this year.",
-                    "domain": "Investment News",
-                    "published": (datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d"),
-                    "relevance_score": 0.87
-                }
-            ]
-            
-        elif any(keyword in query.lower() for keyword in ["news", "current events", "latest", "breaking"]):
-            results = [
-                {
-                    "title": "Breaking: Major Technology Conference Announces Innovation Awards",
-                    "url": "https://example-tech-news.com/innovation-awards",
-                    "snippet": "The annual technology innovation conference has announced this year's award winners, highlighting breakthroughs in artificial intelligence, quantum computing, and sustainable technology.",
-                    "domain": "Technology News",
-                    "published": (datetime.now() - timedelta(hours=6)).strftime("%Y-%m-%d"),
-                    "relevance_score": 0.91
-                },
-                {
-                    "title": "Global Summit on Digital Transformation Concludes",
-                    "url": "https://example-business.com/digital-summit",
-                    "snippet": "World leaders and technology executives concluded a three-day summit on digital transformation, announcing new initiatives for global connectivity and digital literacy.",
-                    "domain": "Business News",
-                    "published": (datetime.now() - timedelta(hours=18)).strftime("%Y-%m-%d"),
-                    "relevance_score": 0.85
-                }
-            ]
-            
-        else:
-            # Generic search results
-            results = [
-                {
-                    "title": f"Latest Information About: {query.title()}",
-                    "url": f"https://example-search.com/results/{query.replace(' ', '-')}",
-                    "snippet": f"Current information and recent updates related to {query}. This comprehensive overview covers the latest developments and trending topics in this area.",
-                    "domain": "General Information",
-                    "published": (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d"),
-                    "relevance_score": 0.78
-                },
-                {
-                    "title": f"Trending Now: {query.title()} Updates",
-                    "url": f"https://example-trends.com/{query.replace(' ', '-')}-updates",
-                    "snippet": f"Stay up-to-date with the latest trends and developments in {query}. Expert analysis and insights on current happenings.",
-                    "domain": "Trending Topics",
-                    "published": (datetime.now() - timedelta(hours=12)).strftime("%Y-%m-%d"),
-                    "relevance_score": 0.75
-                }
+        category = _classify_query(query)
+        if category is not None:
+            return [
+                {**result, "published": _published_dates.get(result["published"])}
+                for result in _RESULTS_BY_CATEGORY[category]
             ]
         
+        # Generic search results
+        title = query.title()
+        slug = query.replace(' ', '-')
+        results = [
+            {
+                "title": f"Latest Information About: {title}",
+                "url": f"https://example-search.com/results/{slug}",
+                "snippet": f"Current information and recent updates related to {query}. This comprehensive overview covers the latest developments and trending topics in this area.",
+                "domain": "General Information",
+                "published": _published_dates.get(timedelta(days=1)),
+                "relevance_score": 0.78
+            },
+            {
+                "title": f"Trending Now: {title} Updates",
+                "url": f"https://example-trends.com/{slug}-updates",
+                "snippet": f"Stay up-to-date with the latest trends and developments in {query}. Expert analysis and insights on current happenings.",
+                "domain": "Trending Topics",
+                "published": _published_dates.get(timedelta(hours=12)),
+                "relevance_score": 0.75
+            }
+        ]
+        
         return results
     
     async def _generate_summary(self, query: str, results: List[Dict[str, Any]]) -> str:
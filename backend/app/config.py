@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
@@ -12,6 +13,8 @@ class Config:
     LLM_MODEL: str = os.getenv("LLM_MODEL", "llama3-8b-8192")
     LLM_TEMPERATURE: float = float(os.getenv("LLM_TEMPERATURE", "0.1"))
     LLM_MAX_TOKENS: int = int(os.getenv("LLM_MAX_TOKENS", "4000"))
+    LLM_CACHE_SIZE: int = int(os.getenv("LLM_CACHE_SIZE", "1024"))  # 0 disables response caching
+    LLM_DISK_CACHE: bool = os.getenv("LLM_DISK_CACHE", "False").lower() == "true"  # needs diskcache
     
     # Database Configuration
     DATABASE_URL: str = os.getenv("DATABASE_URL", f"sqlite:///{BASE_DIR}/db/analytics.db")
@@ -20,6 +23,12 @@ class Config:
     EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
     EMBEDDING_DIMENSION: int = int(os.getenv("EMBEDDING_DIMENSION", "384"))
     EMBEDDING_SERVICE: str = os.getenv("EMBEDDING_SERVICE", "huggingface")
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "128"))
+    EMBEDDING_CONCURRENCY: int = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+    EMBEDDING_CACHE_SIZE: int = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+    EMBEDDING_DISK_CACHE: bool = os.getenv("EMBEDDING_DISK_CACHE", "False").lower() == "true"  # needs diskcache
+    EMBEDDING_QUANTIZE: bool = os.getenv("EMBEDDING_QUANTIZE", "False").lower() == "true"  # int8 on CPU; rebuild the vector DB when toggled
+    EMBEDDING_BATCH_WINDOW_MS: int = int(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "20"))  # 0 disables coalescing
     
     # OpenAI Configuration
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
@@ -27,6 +36,19 @@ class Config:
     
     # Vector Database Configuration
     VECTOR_DB_PATH: str = os.getenv("VECTOR_DB_PATH", str(BASE_DIR / "data" / "vector_db"))
+    FAISS_INDEX_TYPE: str = os.getenv("FAISS_INDEX_TYPE", "hnsw")  # hnsw or flat
+    FAISS_QUANTIZATION: str = os.getenv("FAISS_QUANTIZATION", "none")  # sq8 or none
+    FAISS_SQ_TRAIN_SIZE: int = int(os.getenv("FAISS_SQ_TRAIN_SIZE", "1000"))  # vectors kept unquantized until trained
+    FAISS_HNSW_M: int = int(os.getenv("FAISS_HNSW_M", "32"))
+    FAISS_HNSW_EF_CONSTRUCTION: int = int(os.getenv("FAISS_HNSW_EF_CONSTRUCTION", "200"))
+    FAISS_HNSW_EF_SEARCH: int = int(os.getenv("FAISS_HNSW_EF_SEARCH", "64"))
+    FAISS_SEARCH_THREADS: int = int(os.getenv("FAISS_SEARCH_THREADS", str(os.cpu_count() or 4)))
+    TOP_K_DOCUMENTS: int = int(os.getenv("TOP_K_DOCUMENTS", "5"))
+    QUERY_EMBEDDING_CACHE_SIZE: int = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+    RAG_BATCH_WINDOW_MS: int = int(os.getenv("RAG_BATCH_WINDOW_MS", "10"))  # 0 disables batching
+    SEARCH_CACHE_SIZE: int = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))  # 0 disables answer caching
+    SEARCH_CACHE_SIMILARITY: float = float(os.getenv("SEARCH_CACHE_SIMILARITY", "0.95"))  # cosine, near-duplicate queries
+    VECTOR_DB_SAVE_DELAY: float = float(os.getenv("VECTOR_DB_SAVE_DELAY", "30"))  # seconds, 0 saves immediately
     
     # Document Processing Configuration
     CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "1000"))
@@ -37,6 +59,8 @@ class Config:
     ALLOWED_EXTENSIONS: set = {".pdf", ".docx", ".doc", ".txt", ".md"}
     UPLOAD_TEMP_DIR: str = os.getenv("UPLOAD_TEMP_DIR", "/tmp")
     UPLOAD_PATH: str = os.getenv("UPLOAD_PATH", str(BASE_DIR / "data" / "uploads"))
+    DOCUMENT_LIST_CACHE_TTL: float = float(os.getenv("DOCUMENT_LIST_CACHE_TTL", "2"))  # seconds
+    DOCUMENT_INGEST_CONCURRENCY: int = int(os.getenv("DOCUMENT_INGEST_CONCURRENCY", "8"))  # 1 for spinning disks
     
     # API Configuration
     API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
@@ -50,15 +74,38 @@ class Config:
         "http://localhost:3001",
         "http://127.0.0.1:3001"
     ]
+    CORS_ALLOW_METHODS: list = ["GET", "POST", "DELETE", "OPTIONS"]
+    CORS_ALLOW_HEADERS: list = ["Content-Type", "Authorization"]
     
     # Agent Configuration
     AGENT_MAX_ITERATIONS: int = int(os.getenv("AGENT_MAX_ITERATIONS", "10"))
     AGENT_TIMEOUT: int = int(os.getenv("AGENT_TIMEOUT", "300"))  # 5 minutes
+    AGENT_TOOL_CONCURRENCY_LIMIT: int = int(os.getenv("AGENT_TOOL_CONCURRENCY_LIMIT", "5"))
+    BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "8"))  # queries in flight per /api/ask/batch
+    SESSION_CACHE_SIZE: int = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+    SESSION_TTL: int = int(os.getenv("SESSION_TTL", "3600"))  # 1 hour
+    SESSION_MAX_MESSAGES: int = int(os.getenv("SESSION_MAX_MESSAGES", "50"))
+    MEMORY_WINDOW_EXCHANGES: int = int(os.getenv("MEMORY_WINDOW_EXCHANGES", "3"))
+    REDIS_URL: str = os.getenv("REDIS_URL", "")  # Share sessions across workers when set
+    
+    # SQL Analytics Configuration
+    SQL_QUERY_CACHE_SIZE: int = int(os.getenv("SQL_QUERY_CACHE_SIZE", "128"))
+    
+    # Web Search Configuration
+    WEB_TOOL_SIMULATE_LATENCY: bool = os.getenv("WEB_TOOL_SIMULATE_LATENCY", "False").lower() == "true"
     
     # Chart Configuration
     CHART_OUTPUT_DIR: str = os.getenv("CHART_OUTPUT_DIR", str(BASE_DIR / "temp" / "charts"))
     CHART_DPI: int = int(os.getenv("CHART_DPI", "300"))
     CHART_FIGSIZE: tuple = (10, 6)
+    CHART_MAX_POINTS: int = int(os.getenv("CHART_MAX_POINTS", "2000"))  # downsample larger series
+    CHART_CACHE_SIZE: int = int(os.getenv("CHART_CACHE_SIZE", "64"))  # in-memory copies of charts on disk
+    CHART_TTL: int = int(os.getenv("CHART_TTL", "604800"))  # 7 days before chart files are pruned
+    CHART_INLINE_BASE64: bool = os.getenv("CHART_INLINE_BASE64", "False").lower() == "true"
+    
+    # Export Configuration
+    EXPORT_MAX_SESSIONS: int = int(os.getenv("EXPORT_MAX_SESSIONS", "200"))
+    EXPORT_SESSION_TTL: int = int(os.getenv("EXPORT_SESSION_TTL", "3600"))  # 1 hour since last query
     
     # Logging Configuration
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
@@ -68,8 +115,9 @@ class Config:
     SECRET_KEY: str = os.getenv("SECRET_KEY", "autoanalyst-ai-secret-key-change-in-production")
     
     @classmethod
+    @lru_cache(maxsize=None)
     def validate_config(cls):
-        """Validate that required configuration is present"""
+        """Validate that required configuration is present (runs once per process)"""
         if not cls.GROQ_API_KEY:
             raise ValueError("GROQ_API_KEY environment variable is required")
         
@@ -88,10 +136,3 @@ config = Config()
 def get_settings():
     """Returns the global config instance"""
     return config
-
-# Validate configuration on import
-try:
-    config.validate_config()
-except ValueError as e:
-    print(f"Configuration Error: {e}")
-    print("Please check your environment variables.") 
\ No newline at end of file
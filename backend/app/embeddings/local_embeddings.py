@@ -1,11 +1,26 @@
 from typing import List
+import asyncio
+import hashlib
 import logging
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import torch
 from sentence_transformers import SentenceTransformer
 from langchain.embeddings.base import Embeddings
 from app.config import get_settings
 
+try:
+    import diskcache
+except ImportError:  # The on-disk tier is optional
+    diskcache = None
+
 logger = logging.getLogger(__name__)
 
+# Coalesced async requests are flushed early once this many texts are waiting
+_COALESCE_MAX_TEXTS = 32
+
 class LocalEmbeddings(Embeddings):
     """Local embeddings using sentence-transformers"""
     
@@ -15,13 +30,93 @@ class LocalEmbeddings(Embeddings):
         
         logger.info(f"Loading embedding model: {self.model_name}")
         self.model = SentenceTransformer(self.model_name)
+        self.model.eval()
+        torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+        
+        # Opt-in int8 Linear layers for CPU throughput. The quantized model produces
+        # different vectors, so indexes built with the other variant must be rebuilt.
+        self.quantized = settings.EMBEDDING_QUANTIZE and self.model.device.type == "cpu"
+        if self.quantized:
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
         logger.info("Embedding model loaded successfully")
+        
+        # Repeated texts (retried queries, re-indexed chunks) skip the forward pass.
+        # Keys hash the model variant too, so a model switch never reuses stale vectors.
+        model_variant = f"{self.model_name}{':int8' if self.quantized else ''}"
+        self._key_base = hashlib.blake2b(model_variant.encode("utf-8") + b"\0", digest_size=16)
+        self._cache = OrderedDict()
+        self._cache_size = settings.EMBEDDING_CACHE_SIZE
+        self._cache_lock = threading.Lock()
+        
+        self._disk_cache = None
+        if settings.EMBEDDING_DISK_CACHE:
+            if diskcache is None:
+                logger.warning("diskcache is not installed, embedding disk cache disabled")
+            else:
+                self._disk_cache = diskcache.Cache(os.path.join(settings.VECTOR_DB_PATH, "embed_cache"))
+        
+        # Concurrent async callers on one loop share a forward pass
+        self._batch_window = settings.EMBEDDING_BATCH_WINDOW_MS / 1000
+        self._pending = []
+        self._pending_texts = 0
+        self._pending_loop = None
+        self._flush_handle = None
+    
+    def _key(self, text: str) -> bytes:
+        hasher = self._key_base.copy()
+        hasher.update(text.encode("utf-8"))
+        return hasher.digest()
+    
+    def _remember(self, key: bytes, vector: np.ndarray):
+        with self._cache_lock:
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+    
+    def _embed(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed texts, running the model only on those not cached yet"""
+        vectors = [None] * len(texts)
+        misses = {}  # key -> positions, so duplicates within one call encode once
+        
+        with self._cache_lock:
+            for i, text in enumerate(texts):
+                key = self._key(text)
+                vector = self._cache.get(key)
+                if vector is None:
+                    misses.setdefault(key, []).append(i)
+                else:
+                    self._cache.move_to_end(key)
+                    vectors[i] = vector
+        
+        if misses and self._disk_cache is not None:
+            for key in list(misses):
+                vector = self._disk_cache.get(key)
+                if vector is not None:
+                    for i in misses.pop(key):
+                        vectors[i] = vector
+                    self._remember(key, vector)
+        
+        if misses:
+            encoded = self.model.encode(
+                [texts[positions[0]] for positions in misses.values()],
+                batch_size=64,
+                show_progress_bar=False,
+                convert_to_numpy=True
+            )
+            for (key, positions), vector in zip(misses.items(), encoded):
+                for i in positions:
+                    vectors[i] = vector
+                self._remember(key, vector)
+                if self._disk_cache is not None:
+                    self._disk_cache.set(key, vector)
+        
+        return vectors
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """Embed a list of documents"""
         try:
-            embeddings = self.model.encode(texts, convert_to_tensor=False)
-            return embeddings.tolist()
+            return [vector.tolist() for vector in self._embed(texts)]
         except Exception as e:
             logger.error(f"Error embedding documents: {str(e)}")
             raise
@@ -29,16 +124,61 @@ class LocalEmbeddings(Embeddings):
     def embed_query(self, text: str) -> List[float]:
         """Embed a single query"""
         try:
-            embedding = self.model.encode([text], convert_to_tensor=False)
-            return embedding[0].tolist()
+            return self._embed([text])[0].tolist()
         except Exception as e:
             logger.error(f"Error embedding query: {str(e)}")
             raise
     
     async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
-        """Async embed documents"""
-        return self.embed_documents(texts)
+        """Async embed documents, coalescing with other callers waiting on this loop"""
+        if not texts:
+            return []
+        
+        loop = asyncio.get_running_loop()
+        if self._batch_window <= 0 or (self._pending_loop is not None and self._pending_loop is not loop):
+            return await asyncio.to_thread(self.embed_documents, texts)
+        
+        future = loop.create_future()
+        self._pending.append((texts, future))
+        self._pending_texts += len(texts)
+        self._pending_loop = loop
+        
+        if self._pending_texts >= _COALESCE_MAX_TEXTS:
+            self._flush_pending()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._batch_window, self._flush_pending)
+        
+        return await future
     
     async def aembed_query(self, text: str) -> List[float]:
         """Async embed query"""
-        return self.embed_query(text) 
\ No newline at end of file
+        return (await self.aembed_documents([text]))[0]
+    
+    def _flush_pending(self):
+        """Hand everything queued so far to one forward pass"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        batch, loop = self._pending, self._pending_loop
+        self._pending, self._pending_texts, self._pending_loop = [], 0, None
+        if batch:
+            loop.create_task(self._embed_batch(batch))
+    
+    async def _embed_batch(self, batch: List[tuple]):
+        try:
+            vectors = await asyncio.to_thread(
+                self.embed_documents,
+                [text for texts, _ in batch for text in texts]
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        start = 0
+        for texts, future in batch:
+            if not future.done():
+                future.set_result(vectors[start:start + len(texts)])
+            start += len(texts) 
\ No newline at end of file
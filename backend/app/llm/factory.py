@@ -1,11 +1,30 @@
 from typing import Any
 import logging
+import threading
 from app.config import get_settings
 from app.llm.groq_llm import GroqLLM
+from app.llm.http_client import get_async_client
 
 logger = logging.getLogger(__name__)
 
+# The LLM wrappers hold no per-call state, so the planner and tools share one
+_llm = None
+_llm_lock = threading.Lock()
+
+# Loading a local embedding model takes seconds, so all tools share one instance
+_embeddings = None
+_embeddings_lock = threading.Lock()
+
 def create_llm() -> Any:
+    """Get the shared LLM instance, creating it on first use"""
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                _llm = _build_llm()
+    return _llm
+
+def _build_llm() -> Any:
     """Create LLM instance based on configuration"""
     settings = get_settings()
     
@@ -18,17 +37,34 @@ def create_llm() -> Any:
     elif settings.OPENAI_API_KEY:
         logger.info(f"Using OpenAI LLM with model: {settings.LLM_MODEL}")
         from langchain_openai import ChatOpenAI
-        return ChatOpenAI(
+        from openai import AsyncOpenAI
+        llm = ChatOpenAI(
             model=settings.LLM_MODEL,
             temperature=settings.LLM_TEMPERATURE,
             max_tokens=settings.MAX_TOKENS,
             openai_api_key=settings.OPENAI_API_KEY
         )
+        
+        # Route async calls through the shared pooled HTTP/2 client
+        llm.async_client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=get_async_client()
+        ).chat.completions
+        return llm
     
     else:
         raise ValueError("No LLM API key found. Please set GROQ_API_KEY or OPENAI_API_KEY")
 
 def create_embeddings() -> Any:
+    """Get the shared embeddings instance, creating it on first use"""
+    global _embeddings
+    if _embeddings is None:
+        with _embeddings_lock:
+            if _embeddings is None:
+                _embeddings = _build_embeddings()
+    return _embeddings
+
+def _build_embeddings() -> Any:
     """Create embeddings instance based on configuration"""
     settings = get_settings()
     
@@ -1,13 +1,74 @@
-from typing import Any, Dict, List, Optional
-import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional
+import hashlib
 import logging
+import os
+import threading
+import orjson
+from cachetools import LRUCache
 from groq import Groq
 from langchain.llms.base import LLM
-from langchain.callbacks.manager import CallbackManagerForLLMRun
+from langchain.callbacks.manager import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain.schema.output import GenerationChunk
 from app.config import get_settings
+from app.llm.http_client import get_async_client, get_sync_client
+
+try:
+    import diskcache
+except ImportError:  # The on-disk tier is optional
+    diskcache = None
 
 logger = logging.getLogger(__name__)
 
+GROQ_CHAT_COMPLETIONS_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+# Above this temperature completions vary too much for a cached answer to stand in
+_MAX_CACHED_TEMPERATURE = 0.3
+
+# Responses to identical requests (agent retries, health checks, repeated questions)
+_response_cache = LRUCache(maxsize=max(1, get_settings().LLM_CACHE_SIZE))
+_response_cache_lock = threading.Lock()
+_disk_cache = None
+if get_settings().LLM_DISK_CACHE:
+    if diskcache is None:
+        logger.warning("diskcache is not installed, LLM disk cache disabled")
+    else:
+        _disk_cache = diskcache.Cache(os.path.join(get_settings().VECTOR_DB_PATH, "llm_cache"))
+
+# One SDK client per process; GroqLLM instances share it and its connection pool
+_groq_client: Optional[Groq] = None
+_groq_client_lock = threading.Lock()
+
+def _get_client() -> Groq:
+    """Get the shared Groq client, creating it on first use"""
+    global _groq_client
+    if _groq_client is None:
+        with _groq_client_lock:
+            if _groq_client is None:
+                _groq_client = Groq(api_key=get_settings().GROQ_API_KEY, http_client=get_sync_client())
+    return _groq_client
+
+def _get_cached_response(key: Optional[str]) -> Optional[str]:
+    if key is None:
+        return None
+    with _response_cache_lock:
+        response = _response_cache.get(key)
+    if response is None and _disk_cache is not None:
+        response = _disk_cache.get(key)
+        if response is not None:
+            with _response_cache_lock:
+                _response_cache[key] = response
+    if response is not None:
+        logger.debug(f"LLM cache hit: {key}")
+    return response
+
+def _cache_response(key: Optional[str], response: str):
+    if key is None:
+        return
+    with _response_cache_lock:
+        _response_cache[key] = response
+    if _disk_cache is not None:
+        _disk_cache.set(key, response)
+
 class GroqLLM(LLM):
     """Custom LangChain LLM wrapper for Groq API"""
     
@@ -23,7 +84,7 @@ class GroqLLM(LLM):
         if not settings.GROQ_API_KEY:
             raise ValueError("GROQ_API_KEY is required")
             
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
+        self.client = _get_client()
         self.model_name = settings.LLM_MODEL
         self.temperature = settings.LLM_TEMPERATURE
         self.max_tokens = settings.MAX_TOKENS
@@ -40,6 +101,11 @@ class GroqLLM(LLM):
         **kwargs: Any,
     ) -> str:
         """Call Groq API synchronously"""
+        cache_key = self._cache_key(prompt, stop, kwargs)
+        cached = _get_cached_response(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             response = self.client.chat.completions.create(
                 model=self.model_name,
@@ -52,7 +118,9 @@ class GroqLLM(LLM):
                 **kwargs
             )
             
-            return response.choices[0].message.content
+            content = response.choices[0].message.content
+            _cache_response(cache_key, content)
+            return content
             
         except Exception as e:
             logger.error(f"Error calling Groq API: {str(e)}")
@@ -62,16 +130,98 @@ class GroqLLM(LLM):
         self,
         prompt: str,
         stop: Optional[List[str]] = None,
-        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
         **kwargs: Any,
     ) -> str:
         """Call Groq API asynchronously"""
-        # Groq client doesn't have async support yet, so we'll use sync in thread
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            None, 
-            lambda: self._call(prompt, stop, run_manager, **kwargs)
-        )
+        cache_key = self._cache_key(prompt, stop, kwargs)
+        cached = _get_cached_response(cache_key)
+        if cached is not None:
+            return cached
+        
+        if run_manager is not None:
+            # Stream so callbacks (astream_events, /api/ask/stream) see tokens as they arrive
+            content = "".join([
+                chunk.text async for chunk in self._astream(prompt, stop=stop, run_manager=run_manager, **kwargs)
+            ])
+            _cache_response(cache_key, content)
+            return content
+        
+        # Post straight to the OpenAI-compatible endpoint on the shared pooled client
+        # rather than bouncing the sync SDK through a worker thread
+        try:
+            response = await get_async_client().post(
+                GROQ_CHAT_COMPLETIONS_URL,
+                headers={"Authorization": f"Bearer {get_settings().GROQ_API_KEY}"},
+                json=self._request_body(prompt, stop, kwargs)
+            )
+            response.raise_for_status()
+            
+            content = response.json()["choices"][0]["message"]["content"]
+            _cache_response(cache_key, content)
+            return content
+            
+        except Exception as e:
+            logger.error(f"Error calling Groq API: {str(e)}")
+            raise
+    
+    async def _astream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[GenerationChunk]:
+        """Stream a Groq completion, one chunk per server-sent delta"""
+        try:
+            async with get_async_client().stream(
+                "POST",
+                GROQ_CHAT_COMPLETIONS_URL,
+                headers={"Authorization": f"Bearer {get_settings().GROQ_API_KEY}"},
+                json=self._request_body(prompt, stop, {**kwargs, "stream": True})
+            ) as response:
+                response.raise_for_status()
+                
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    
+                    choices = orjson.loads(data).get("choices") or []
+                    text = choices[0].get("delta", {}).get("content") if choices else None
+                    if not text:
+                        continue
+                    
+                    chunk = GenerationChunk(text=text)
+                    if run_manager is not None:
+                        await run_manager.on_llm_new_token(text, chunk=chunk)
+                    yield chunk
+            
+        except Exception as e:
+            logger.error(f"Error streaming from Groq API: {str(e)}")
+            raise
+    
+    def _request_body(self, prompt: str, stop: Optional[List[str]], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """JSON body for a chat-completions request"""
+        return {
+            "model": self.model_name,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "stop": stop,
+            **kwargs
+        }
+    
+    def _cache_key(self, prompt: str, stop: Optional[List[str]], kwargs: Dict[str, Any]) -> Optional[str]:
+        """Key identifying a request, or None if its response shouldn't be cached"""
+        if kwargs or get_settings().LLM_CACHE_SIZE <= 0 or self.temperature > _MAX_CACHED_TEMPERATURE:
+            return None
+        payload = orjson.dumps([self.model_name, self.temperature, self.max_tokens, stop, prompt])
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
     
     @property
     def _identifying_params(self) -> Dict[str, Any]:
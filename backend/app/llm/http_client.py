@@ -0,0 +1,47 @@
+from typing import Optional
+import logging
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# One pooled HTTP/2 client per process, so LLM calls reuse warm connections
+# instead of paying a TCP+TLS handshake each time
+_async_client: Optional[httpx.AsyncClient] = None
+_sync_client: Optional[httpx.Client] = None
+
+def get_async_client() -> httpx.AsyncClient:
+    """Get the shared async HTTP client, creating it on first use"""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(120.0),
+            limits=httpx.Limits(max_keepalive_connections=100, max_connections=200)
+        )
+    return _async_client
+
+def get_sync_client() -> httpx.Client:
+    """Get the shared blocking HTTP client used by the sync SDK paths"""
+    global _sync_client
+    if _sync_client is None or _sync_client.is_closed:
+        _sync_client = httpx.Client(
+            http2=True,
+            timeout=httpx.Timeout(60.0),
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=100, keepalive_expiry=60)
+        )
+    return _sync_client
+
+def close_sync_client():
+    """Close the shared blocking HTTP client"""
+    global _sync_client
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
+
+async def close_async_client():
+    """Close the shared async HTTP client"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+        logger.info("Closed shared HTTP client")
@@ -1,18 +1,22 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse, Response
 import uvicorn
+import asyncio
 import os
 from pathlib import Path
 from typing import List, Dict, Any
-import json
+import orjson
 import tempfile
-import shutil
+import aiofiles
 import logging
 
 from .agents.planner import QueryPlanner
 from .services.document_service import DocumentService
 from .services.export_service import ExportService
+from .services.chart_store import get_chart
+from .llm.factory import create_embeddings
+from .llm.http_client import close_async_client, close_sync_client
 from .config import config
 
 # Configure logging
@@ -24,7 +28,8 @@ app = FastAPI(
     description="Intelligent research and data analysis platform",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -32,8 +37,8 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=config.CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=config.CORS_ALLOW_METHODS,
+    allow_headers=config.CORS_ALLOW_HEADERS,
 )
 
 # Initialize services
@@ -45,11 +50,30 @@ export_service = ExportService()
 async def startup_event():
     """Initialize services on startup"""
     try:
+        config.validate_config()
+    except ValueError as e:
+        logger.error(f"Configuration error: {e}. Please check your environment variables.")
+    
+    try:
+        # Load the embedding model before serving, off the event loop
+        await asyncio.to_thread(create_embeddings)
         await document_service.initialize()
+        await export_service.initialize()
         # Add other service initializations here if needed
     except Exception as e:
         print(f"Error initializing services: {str(e)}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush pending state on shutdown"""
+    try:
+        await query_planner.close()
+        await document_service.close()
+        await close_async_client()
+        close_sync_client()
+    except Exception as e:
+        print(f"Error shutting down services: {str(e)}")
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -119,27 +143,105 @@ async def ask_question(request: Dict[str, Any]):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
+@app.post("/api/ask/batch")
+async def ask_questions_batch(request: Dict[str, Any]):
+    """Process several user queries concurrently in one request"""
+    try:
+        queries = request.get("queries", [])
+        session_id = request.get("session_id", "default")
+        
+        if not queries or not isinstance(queries, list) or not all(isinstance(q, str) and q for q in queries):
+            raise HTTPException(status_code=400, detail="queries must be a non-empty list of strings")
+        
+        responses = await query_planner.process_batch(queries, session_id)
+        
+        return {
+            "answers": [
+                {
+                    "answer": response.get("answer", ""),
+                    "sources": response.get("sources", []),
+                    "charts": response.get("charts", []),
+                    "query_type": response.get("query_type", "general")
+                }
+                for response in responses
+            ],
+            "session_id": session_id
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing queries: {str(e)}")
+
+@app.post("/api/ask/stream")
+async def ask_question_stream(request: Dict[str, Any]):
+    """Process user queries, streaming the answer as server-sent events"""
+    query = request.get("query", "")
+    session_id = request.get("session_id", "default")
+    
+    if not query:
+        raise HTTPException(status_code=400, detail="Query is required")
+    
+    async def event_stream():
+        async for event in query_planner.stream_query(query, session_id):
+            if event["type"] == "result":
+                event["session_id"] = session_id
+            yield b"data: " + orjson.dumps(event) + b"\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _validate_upload(file: UploadFile) -> str:
+    """Check an upload's name and type, returning its extension"""
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No file provided")
+    
+    # Validate file type
+    allowed_extensions = {'.pdf', '.docx', '.doc', '.txt', '.md'}
+    file_extension = Path(file.filename).suffix.lower()
+    
+    if file_extension not in allowed_extensions:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"File type {file_extension} not supported. Allowed: {', '.join(allowed_extensions)}"
+        )
+    return file_extension
+
+async def _save_upload(file: UploadFile, file_extension: str) -> str:
+    """Save an upload to a temporary file, returning its path"""
+    fd, tmp_path = tempfile.mkstemp(suffix=file_extension)
+    os.close(fd)
+    
+    try:
+        # Stream to disk in 1MB chunks without blocking the loop, stopping as
+        # soon as the size limit is passed
+        size = 0
+        async with aiofiles.open(tmp_path, 'wb') as tmp_file:
+            while chunk := await file.read(1 << 20):
+                size += len(chunk)
+                if size > config.MAX_FILE_SIZE:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large. Maximum size is {config.MAX_FILE_SIZE // (1024 * 1024)}MB"
+                    )
+                await tmp_file.write(chunk)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    
+    return tmp_path
+
 @app.post("/api/upload")
 async def upload_document(file: UploadFile = File(...)):
     """Upload and process documents"""
     try:
-        if not file.filename:
-            raise HTTPException(status_code=400, detail="No file provided")
-        
-        # Validate file type
-        allowed_extensions = {'.pdf', '.docx', '.doc', '.txt', '.md'}
-        file_extension = Path(file.filename).suffix.lower()
-        
-        if file_extension not in allowed_extensions:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"File type {file_extension} not supported. Allowed: {', '.join(allowed_extensions)}"
-            )
+        file_extension = _validate_upload(file)
         
         # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as tmp_file:
-            shutil.copyfileobj(file.file, tmp_file)
-            tmp_path = tmp_file.name
+        tmp_path = await _save_upload(file, file_extension)
         
         try:
             # Process the document
@@ -158,9 +260,56 @@ async def upload_document(file: UploadFile = File(...)):
             if os.path.exists(tmp_path):
                 os.unlink(tmp_path)
                 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading document: {str(e)}")
 
+@app.post("/api/upload/batch")
+async def upload_documents(files: List[UploadFile] = File(...)):
+    """Upload several documents and process them concurrently"""
+    try:
+        file_extensions = [_validate_upload(file) for file in files]
+        
+        tmp_paths = []
+        try:
+            for file, file_extension in zip(files, file_extensions):
+                tmp_paths.append(await _save_upload(file, file_extension))
+            
+            # One failed document doesn't fail the others
+            results = await document_service.process_documents(
+                tmp_paths,
+                [file.filename for file in files]
+            )
+            
+            return {
+                "documents": [
+                    {
+                        "filename": file.filename,
+                        "status": "failed",
+                        "message": str(result)
+                    } if isinstance(result, Exception) else {
+                        "id": result["id"],
+                        "filename": file.filename,
+                        "status": "completed",
+                        "message": "Document processed successfully",
+                        "chunks_created": result.get("chunks_created", 0)
+                    }
+                    for file, result in zip(files, results)
+                ]
+            }
+            
+        finally:
+            # Clean up temporary files
+            for tmp_path in tmp_paths:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error uploading documents: {str(e)}")
+
 @app.get("/api/documents")
 async def list_documents():
     """Get list of uploaded documents"""
@@ -175,14 +324,45 @@ async def list_documents():
 async def delete_document(document_id: str):
     """Delete a document"""
     try:
-        success = document_service.delete_document(document_id)
-        if success:
-            return {"message": "Document deleted successfully"}
-        else:
+        result = await document_service.delete_document(document_id)
+        if result["status"] == "not_found":
             raise HTTPException(status_code=404, detail="Document not found")
+        elif result["status"] == "error":
+            raise HTTPException(status_code=500, detail=result["message"])
+        else:
+            return {"message": "Document deleted successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting document: {str(e)}")
 
+@app.post("/api/documents/delete")
+async def delete_documents(request: Dict[str, Any]):
+    """Delete several documents in one request"""
+    try:
+        filenames = request.get("filenames", [])
+        if not filenames:
+            raise HTTPException(status_code=400, detail="No filenames provided")
+        
+        results = await document_service.delete_documents(filenames)
+        return {"results": results}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deleting documents: {str(e)}")
+
+@app.get("/api/charts/{chart_id}")
+async def get_chart_image(chart_id: str):
+    """Serve a chart generated by the analytics tool"""
+    png_bytes = await asyncio.to_thread(get_chart, chart_id)
+    if png_bytes is None:
+        raise HTTPException(status_code=404, detail="Chart not found")
+    return Response(
+        content=png_bytes,
+        media_type="image/png",
+        headers={"Cache-Control": "private, max-age=3600"}
+    )
+
 @app.post("/api/export-pdf")
 async def export_chat_pdf(request: Dict[str, Any]):
     """Export chat session as PDF"""
@@ -0,0 +1,74 @@
+from typing import Optional
+import os
+import re
+import threading
+import time
+import uuid
+from cachetools import LRUCache
+
+from app.config import config
+
+# Rendered PNGs served by id, so responses link to charts instead of inlining base64.
+# Files under CHART_OUTPUT_DIR are the durable copy (shared across workers and
+# restarts); the LRU only saves re-reading recently viewed charts.
+_charts: LRUCache = LRUCache(maxsize=config.CHART_CACHE_SIZE)
+_charts_lock = threading.Lock()
+_last_prune = 0.0
+_CHART_ID = re.compile(r"^[0-9a-f]{32}$")
+
+def _chart_path(chart_id: str) -> str:
+    return os.path.join(config.CHART_OUTPUT_DIR, f"{chart_id}.png")
+
+def _prune_expired():
+    """Remove chart files older than CHART_TTL, at most once per minute"""
+    global _last_prune
+    now = time.time()
+    if now - _last_prune < 60:
+        return
+    _last_prune = now
+    
+    cutoff = now - config.CHART_TTL
+    try:
+        with os.scandir(config.CHART_OUTPUT_DIR) as entries:
+            for entry in entries:
+                if entry.name.endswith(".png") and entry.stat().st_mtime < cutoff:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+    except FileNotFoundError:
+        pass
+
+def store_chart(png_bytes: bytes) -> str:
+    """Persist a rendered chart and return the id it is served under"""
+    chart_id = uuid.uuid4().hex
+    os.makedirs(config.CHART_OUTPUT_DIR, exist_ok=True)
+    tmp_path = f"{_chart_path(chart_id)}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(png_bytes)
+    os.replace(tmp_path, _chart_path(chart_id))
+    
+    with _charts_lock:
+        _charts[chart_id] = png_bytes
+        _prune_expired()
+    return chart_id
+
+def get_chart(chart_id: str) -> Optional[bytes]:
+    """Get a stored chart, or None if it is unknown or has expired"""
+    if not _CHART_ID.match(chart_id):
+        return None
+    
+    with _charts_lock:
+        png_bytes = _charts.get(chart_id)
+    if png_bytes is not None:
+        return png_bytes
+    
+    try:
+        with open(_chart_path(chart_id), "rb") as f:
+            png_bytes = f.read()
+    except FileNotFoundError:
+        return None
+    
+    with _charts_lock:
+        _charts[chart_id] = png_bytes
+    return png_bytes
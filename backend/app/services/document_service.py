@@ -1,20 +1,87 @@
-from typing import Dict, List, Any, Optional
+from typing import Awaitable, Callable, Dict, List, Any, Optional
+import asyncio
 import os
 import shutil
+import time
 import logging
+import aiofiles.os
+from collections import Counter, OrderedDict
 from datetime import datetime
+import numpy as np
 
 from app.agents.tools.rag_tool import RAGTool
+from app.services.file_utils import iter_files
 from app.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+class _EmbedBatcher:
+    """Coalesces embedding requests that arrive together into one call"""
+    
+    def __init__(
+        self,
+        embed_many: Callable[[List[str]], Awaitable[List[List[float]]]],
+        flush_ms: float = 5,
+        max_batch: int = 32
+    ):
+        self._embed_many = embed_many
+        self._flush_delay = flush_ms / 1000
+        self._max_batch = max_batch
+        self._pending: List[tuple] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+    
+    async def embed(self, text: str) -> List[float]:
+        """Embed one text, sharing the call with any others queued in the window"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        
+        if len(self._pending) >= self._max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._flush_delay, self._flush)
+        
+        return await future
+    
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.get_running_loop().create_task(self._embed_batch(batch))
+    
+    async def _embed_batch(self, batch: List[tuple]):
+        try:
+            vectors = await self._embed_many([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
 class DocumentService:
     """Service for managing document upload, processing, and retrieval"""
     
     def __init__(self):
         self.settings = get_settings()
         self.rag_tool = None
+        # (cached_at, upload_dir_mtime, documents); stats and health checks re-list often
+        self._docs_cache = None
+        self._stats_cache = None
+        # Probed once at startup rather than on every health poll
+        self._upload_writable = False
+        # Search answers by normalized query, plus (unit query vector, query, response,
+        # cited filenames) entries that serve near-duplicate queries by cosine similarity
+        self._exact_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._sem_cache: List[tuple] = []
+        self._sem_matrix: Optional[np.ndarray] = None
+        self._embed_batcher: Optional[_EmbedBatcher] = None
         
     async def initialize(self):
         """Initialize the document service"""
@@ -22,9 +89,12 @@ class DocumentService:
             # Initialize RAG tool
             self.rag_tool = RAGTool()
             await self.rag_tool.initialize()
+            # Goes through the RAG tool's query-vector LRU, so its search reuses the result
+            self._embed_batcher = _EmbedBatcher(self.rag_tool._embed_queries)
             
             # Ensure upload directory exists
-            os.makedirs(self.settings.UPLOAD_PATH, exist_ok=True)
+            await aiofiles.os.makedirs(self.settings.UPLOAD_PATH, exist_ok=True)
+            self._upload_writable = os.access(self.settings.UPLOAD_PATH, os.W_OK)
             
             logger.info("Document service initialized successfully")
             
@@ -32,6 +102,11 @@ class DocumentService:
             logger.error(f"Error initializing document service: {str(e)}")
             raise
     
+    async def close(self):
+        """Flush pending vector store changes before shutdown"""
+        if self.rag_tool:
+            await self.rag_tool.close()
+    
     async def process_document(self, file_path: str, filename: str = None) -> Dict[str, Any]:
         """Process an uploaded document and add it to the vector store"""
         try:
@@ -39,7 +114,7 @@ class DocumentService:
                 raise ValueError("Document service not initialized")
             
             # Validate file exists
-            if not os.path.exists(file_path):
+            if not await aiofiles.os.path.exists(file_path):
                 raise FileNotFoundError(f"File not found: {file_path}")
             
             # Use provided filename or extract from path
@@ -47,6 +122,10 @@ class DocumentService:
             
             # Add document to RAG tool
             result = await self.rag_tool.add_document(file_path)
+            self._docs_cache = None
+            self._stats_cache = None
+            # New content can change any answer
+            self._clear_search_cache()
             
             logger.info(f"Processed document: {actual_filename}")
             
@@ -63,73 +142,136 @@ class DocumentService:
             logger.error(f"Error processing document: {str(e)}")
             raise
     
+    async def process_documents(self, file_paths: List[str], filenames: Optional[List[str]] = None) -> List[Any]:
+        """Process several documents concurrently
+        
+        Returns one result per path, in order; a failed document yields its
+        exception instead of aborting the batch.
+        """
+        semaphore = asyncio.Semaphore(max(1, self.settings.DOCUMENT_INGEST_CONCURRENCY))
+        filenames = filenames or [None] * len(file_paths)
+        
+        async def process(file_path: str, filename: Optional[str]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.process_document(file_path, filename)
+        
+        return await asyncio.gather(
+            *(process(file_path, filename) for file_path, filename in zip(file_paths, filenames)),
+            return_exceptions=True
+        )
+    
     async def list_documents(self) -> List[Dict[str, Any]]:
         """List all uploaded and processed documents"""
         try:
             if not self.rag_tool:
                 return []
             
+            # Reuse a recent listing while the upload directory is unchanged
+            dir_mtime = await self._upload_dir_mtime()
+            cached = self._docs_cache
+            if (
+                cached is not None
+                and time.monotonic() - cached[0] < self.settings.DOCUMENT_LIST_CACHE_TTL
+                and cached[1] == dir_mtime
+            ):
+                return list(cached[2])
+            
             # Get documents from RAG tool
             rag_documents = await self.rag_tool.list_documents()
             
-            # Get files in upload directory
-            upload_files = []
-            if os.path.exists(self.settings.UPLOAD_PATH):
-                for filename in os.listdir(self.settings.UPLOAD_PATH):
-                    file_path = os.path.join(self.settings.UPLOAD_PATH, filename)
-                    if os.path.isfile(file_path):
-                        upload_files.append({
-                            "filename": filename,
-                            "file_path": file_path,
-                            "file_size": os.path.getsize(file_path),
-                            "uploaded_date": datetime.fromtimestamp(
-                                os.path.getctime(file_path)
-                            ).isoformat()
-                        })
+            # Get files in upload directory (stat calls block, so scan in a worker thread)
+            upload_files = await asyncio.to_thread(self._scan_upload_dir)
             
             # Merge information
-            documents = []
-            for rag_doc in rag_documents:
-                # Find corresponding upload file
-                upload_info = next(
-                    (f for f in upload_files if f["filename"] == rag_doc["filename"]),
-                    None
-                )
-                
-                doc_info = {
-                    **rag_doc,
-                    "processed": True,
-                    "upload_info": upload_info
-                }
-                documents.append(doc_info)
+            upload_by_name = {upload_file["filename"]: upload_file for upload_file in upload_files}
+            documents = [
+                self._processed_entry(rag_doc, upload_by_name.get(rag_doc["filename"]))
+                for rag_doc in rag_documents
+            ]
             
             # Add unprocessed files
             processed_filenames = {doc["filename"] for doc in rag_documents}
-            for upload_file in upload_files:
-                if upload_file["filename"] not in processed_filenames:
-                    documents.append({
-                        **upload_file,
-                        "processed": False,
-                        "chunks_count": 0
-                    })
+            for filename, upload_file in upload_by_name.items():
+                if filename not in processed_filenames:
+                    documents.append(self._unprocessed_entry(upload_file))
             
-            return documents
+            self._docs_cache = (time.monotonic(), dir_mtime, documents)
+            return list(documents)
             
         except Exception as e:
             logger.error(f"Error listing documents: {str(e)}")
             return []
     
+    async def _upload_dir_mtime(self) -> Optional[float]:
+        try:
+            return (await aiofiles.os.stat(self.settings.UPLOAD_PATH)).st_mtime
+        except OSError:
+            return None
+    
+    @staticmethod
+    def _upload_info(filename: str, file_path: str, stat: os.stat_result) -> Dict[str, Any]:
+        """Describe an uploaded file from its stat result"""
+        return {
+            "filename": filename,
+            "file_path": file_path,
+            "file_size": stat.st_size,
+            "uploaded_date": datetime.fromtimestamp(stat.st_ctime).isoformat()
+        }
+    
+    @staticmethod
+    def _processed_entry(rag_doc: Dict[str, Any], upload_info: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Listing entry for a document that is in the vector store"""
+        return {
+            **rag_doc,
+            "processed": True,
+            "upload_info": upload_info
+        }
+    
+    @staticmethod
+    def _unprocessed_entry(upload_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Listing entry for an uploaded file that hasn't been indexed"""
+        return {
+            **upload_info,
+            "processed": False,
+            "chunks_count": 0
+        }
+    
+    def _scan_upload_dir(self) -> List[Dict[str, Any]]:
+        """Describe every file in the upload directory (blocking)"""
+        return [
+            self._upload_info(filename, file_path, stat)
+            for filename, file_path, stat in iter_files(self.settings.UPLOAD_PATH)
+        ]
+    
+    def _scan_stats(self) -> Dict[str, int]:
+        """Map each file in the upload directory to its size (blocking)"""
+        return {
+            filename: stat.st_size
+            for filename, _, stat in iter_files(self.settings.UPLOAD_PATH)
+        }
+    
+    def _stat_upload(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Describe one file in the upload directory, or None if it isn't there (blocking)"""
+        file_path = os.path.join(self.settings.UPLOAD_PATH, filename)
+        if not os.path.isfile(file_path):
+            return None
+        return self._upload_info(filename, file_path, os.stat(file_path))
+    
     async def delete_document(self, filename: str) -> Dict[str, Any]:
         """Delete a document from both storage and vector store"""
         try:
             success = True
+            found = False
             errors = []
             
             # Remove from vector store if RAG tool is available
             if self.rag_tool:
                 try:
                     rag_success = await self.rag_tool.delete_document(filename)
-                    if not rag_success:
+                    self._evict_search_cache(filename)
+                    if rag_success:
+                        found = True
+                    else:
                         errors.append("Document not found in vector store")
                 except Exception as e:
                     errors.append(f"Error removing from vector store: {str(e)}")
@@ -137,9 +279,10 @@ class DocumentService:
             
             # Remove physical file
             file_path = os.path.join(self.settings.UPLOAD_PATH, filename)
-            if os.path.exists(file_path):
+            if await aiofiles.os.path.exists(file_path):
+                found = True
                 try:
-                    os.remove(file_path)
+                    await aiofiles.os.remove(file_path)
                     logger.info(f"Deleted file: {filename}")
                 except Exception as e:
                     errors.append(f"Error deleting file: {str(e)}")
@@ -147,6 +290,14 @@ class DocumentService:
             else:
                 errors.append("File not found in upload directory")
             
+            self._docs_cache = None
+            self._stats_cache = None
+            if success and not found:
+                return {
+                    "status": "not_found",
+                    "message": f"Document '{filename}' not found",
+                    "errors": errors
+                }
             return {
                 "status": "success" if success else "partial_success",
                 "message": f"Document '{filename}' deletion completed",
@@ -155,25 +306,78 @@ class DocumentService:
             
         except Exception as e:
             logger.error(f"Error deleting document: {str(e)}")
+            self._docs_cache = None
+            self._stats_cache = None
             return {
                 "status": "error",
                 "message": f"Failed to delete document: {str(e)}",
                 "errors": [str(e)]
             }
     
+    async def delete_documents(self, filenames: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Delete several documents with one vector store update and concurrent file removal"""
+        filenames = list(dict.fromkeys(filenames))
+        results = {filename: {"status": "success", "errors": []} for filename in filenames}
+        found = set()
+        
+        # Remove from vector store in one call if RAG tool is available
+        if self.rag_tool:
+            try:
+                deleted = await self.rag_tool.delete_documents(filenames)
+                for filename, rag_success in deleted.items():
+                    if rag_success:
+                        found.add(filename)
+                        self._evict_search_cache(filename)
+                    else:
+                        results[filename]["errors"].append("Document not found in vector store")
+            except Exception as e:
+                for result in results.values():
+                    result["errors"].append(f"Error removing from vector store: {str(e)}")
+                    result["status"] = "partial_success"
+        
+        # Remove physical files
+        removals = await asyncio.gather(
+            *(aiofiles.os.remove(os.path.join(self.settings.UPLOAD_PATH, filename)) for filename in filenames),
+            return_exceptions=True
+        )
+        for filename, removal in zip(filenames, removals):
+            if isinstance(removal, FileNotFoundError):
+                results[filename]["errors"].append("File not found in upload directory")
+                if filename not in found and results[filename]["status"] == "success":
+                    # Missing from both the vector store and the upload directory
+                    results[filename]["status"] = "not_found"
+            elif isinstance(removal, Exception):
+                results[filename]["errors"].append(f"Error deleting file: {str(removal)}")
+                results[filename]["status"] = "partial_success"
+        
+        self._docs_cache = None
+        self._stats_cache = None
+        logger.info(f"Deleted {len(filenames)} documents")
+        return results
+    
     async def get_document_info(self, filename: str) -> Optional[Dict[str, Any]]:
         """Get detailed information about a specific document"""
         try:
-            documents = await self.list_documents()
-            return next(
-                (doc for doc in documents if doc["filename"] == filename),
-                None
-            )
+            return await self._get_document_by_filename(filename)
             
         except Exception as e:
             logger.error(f"Error getting document info: {str(e)}")
             return None
     
+    async def _get_document_by_filename(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Look up one document without listing the whole upload directory"""
+        if not self.rag_tool:
+            return None
+        
+        rag_doc = await self.rag_tool.get_document(filename)
+        upload_info = await asyncio.to_thread(self._stat_upload, filename)
+        
+        if rag_doc is not None:
+            return self._processed_entry(rag_doc, upload_info)
+        if upload_info is not None:
+            return self._unprocessed_entry(upload_info)
+        return None
+    
     async def search_documents(self, query: str) -> Dict[str, Any]:
         """Search through processed documents"""
         try:
@@ -183,15 +387,30 @@ class DocumentService:
                     "message": "Document search not available - RAG tool not initialized"
                 }
             
+            key = " ".join(query.lower().split())
+            cached = self._exact_cache.get(key)
+            if cached is not None and self._cache_entry_valid(cached):
+                self._exact_cache.move_to_end(key)
+                return self._search_response(query, cached)
+            
+            # Concurrent misses share one embedding call; the RAG tool reuses the
+            # vectors for its own search
+            vector = None
+            if self.settings.SEARCH_CACHE_SIZE > 0:
+                vector = np.asarray(await self._embed_batcher.embed(query), dtype=np.float32)
+                vector /= np.linalg.norm(vector) or 1.0
+                cached = self._lookup_similar(vector)
+                if cached is not None:
+                    return self._search_response(query, cached)
+            
             # Use RAG tool to search
             result = await self.rag_tool._arun(query)
             
-            return {
-                "results": result.get("sources", []),
-                "answer": result.get("answer", ""),
-                "query": query,
-                "search_time": datetime.now().isoformat()
-            }
+            # Only grounded answers are worth repeating
+            if vector is not None and result.get("sources"):
+                self._cache_search(key, vector, result)
+            
+            return self._search_response(query, result)
             
         except Exception as e:
             logger.error(f"Error searching documents: {str(e)}")
@@ -201,40 +420,116 @@ class DocumentService:
                 "query": query
             }
     
+    @staticmethod
+    def _search_response(query: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "results": result.get("sources", []),
+            "answer": result.get("answer", ""),
+            "query": query,
+            "search_time": datetime.now().isoformat()
+        }
+    
+    def _cache_entry_valid(self, result: Dict[str, Any]) -> bool:
+        """An answer stays valid only while every document it cites is still indexed"""
+        return all(
+            source["filename"] in self.rag_tool.document_metadata
+            for source in result.get("sources", [])
+        )
+    
+    def _lookup_similar(self, vector: np.ndarray) -> Optional[Dict[str, Any]]:
+        """Find a cached answer for a near-duplicate query"""
+        if not self._sem_cache:
+            return None
+        if self._sem_matrix is None:
+            self._sem_matrix = np.vstack([entry[0] for entry in self._sem_cache])
+        
+        similarities = self._sem_matrix @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.settings.SEARCH_CACHE_SIMILARITY:
+            return None
+        
+        _, _, result, sources = self._sem_cache[best]
+        if not sources.issubset(self.rag_tool.document_metadata):
+            return None
+        return result
+    
+    def _cache_search(self, key: str, vector: np.ndarray, result: Dict[str, Any]):
+        self._exact_cache[key] = result
+        self._exact_cache.move_to_end(key)
+        while len(self._exact_cache) > self.settings.SEARCH_CACHE_SIZE:
+            self._exact_cache.popitem(last=False)
+        
+        sources = {source["filename"] for source in result["sources"]}
+        self._sem_cache.append((vector, key, result, sources))
+        del self._sem_cache[:-self.settings.SEARCH_CACHE_SIZE]
+        self._sem_matrix = None
+    
+    def _clear_search_cache(self):
+        self._exact_cache.clear()
+        self._sem_cache = []
+        self._sem_matrix = None
+    
+    def _evict_search_cache(self, filename: str):
+        """Drop cached answers that cite a removed document"""
+        for key in [key for key, result in self._exact_cache.items() if not self._cache_entry_valid(result)]:
+            del self._exact_cache[key]
+        self._sem_cache = [entry for entry in self._sem_cache if filename not in entry[3]]
+        self._sem_matrix = None
+    
     async def get_upload_stats(self) -> Dict[str, Any]:
         """Get statistics about uploaded documents"""
         try:
-            documents = await self.list_documents()
+            dir_mtime = None
+            if not self.rag_tool:
+                rag_documents, upload_sizes = [], {}
+            else:
+                # Reuse recent stats while the upload directory is unchanged
+                dir_mtime = await self._upload_dir_mtime()
+                cached = self._stats_cache
+                if (
+                    cached is not None
+                    and time.monotonic() - cached[0] < self.settings.DOCUMENT_LIST_CACHE_TTL
+                    and cached[1] == dir_mtime
+                ):
+                    return dict(cached[2])
+                
+                # Aggregate straight from the index and one directory pass rather
+                # than building the merged listing
+                rag_documents = await self.rag_tool.list_documents()
+                upload_sizes = await asyncio.to_thread(self._scan_stats)
             
-            total_documents = len(documents)
-            processed_documents = len([doc for doc in documents if doc.get("processed", False)])
-            total_chunks = sum(doc.get("chunks_count", 0) for doc in documents)
+            processed = {doc["filename"]: doc for doc in rag_documents}
+            unprocessed = [filename for filename in upload_sizes if filename not in processed]
+            
+            total_documents = len(processed) + len(unprocessed)
+            processed_documents = len(processed)
+            total_chunks = sum(doc.get("chunks_count", 0) for doc in rag_documents)
             
             # Calculate total file size
-            total_size = 0
-            for doc in documents:
-                if "file_size" in doc:
-                    total_size += doc["file_size"]
-                elif doc.get("upload_info") and "file_size" in doc["upload_info"]:
-                    total_size += doc["upload_info"]["file_size"]
+            total_size = sum(
+                doc["file_size"] if "file_size" in doc else upload_sizes.get(filename, 0)
+                for filename, doc in processed.items()
+            ) + sum(upload_sizes[filename] for filename in unprocessed)
             
             # File type breakdown
-            file_types = {}
-            for doc in documents:
-                filename = doc["filename"]
-                ext = os.path.splitext(filename)[1].lower()
-                file_types[ext] = file_types.get(ext, 0) + 1
+            file_types = Counter(
+                os.path.splitext(filename)[1].lower()
+                for filename in (*processed, *unprocessed)
+            )
             
-            return {
+            stats = {
                 "total_documents": total_documents,
                 "processed_documents": processed_documents,
                 "unprocessed_documents": total_documents - processed_documents,
                 "total_chunks": total_chunks,
                 "total_size_bytes": total_size,
                 "total_size_mb": round(total_size / (1024 * 1024), 2),
-                "file_types": file_types,
+                "file_types": dict(file_types),
                 "avg_chunks_per_doc": round(total_chunks / max(processed_documents, 1), 1)
             }
+            if self.rag_tool:
+                self._stats_cache = (time.monotonic(), dir_mtime, stats)
+            return dict(stats)
             
         except Exception as e:
             logger.error(f"Error getting upload stats: {str(e)}")
@@ -244,16 +539,23 @@ class DocumentService:
                 "error": str(e)
             }
     
-    async def health_check(self) -> Dict[str, Any]:
-        """Check health of the document service"""
+    async def health_check(self, deep: bool = False) -> Dict[str, Any]:
+        """Check health of the document service
+        
+        Document stats come from the TTL cache behind get_upload_stats; deep
+        forces them to be recomputed.
+        """
         try:
             health_info = {
                 "status": "healthy",
                 "rag_tool_initialized": self.rag_tool is not None,
                 "upload_directory_exists": os.path.exists(self.settings.UPLOAD_PATH),
-                "upload_directory_writable": os.access(self.settings.UPLOAD_PATH, os.W_OK)
+                "upload_directory_writable": self._upload_writable
             }
             
+            if deep:
+                self._stats_cache = None
+            
             # Check RAG tool health
             if self.rag_tool:
                 rag_health = await self.rag_tool.health_check()
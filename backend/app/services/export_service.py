@@ -1,8 +1,14 @@
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
+import asyncio
 import os
 import base64
+import html
 import logging
+import time
+import uuid
+from collections import Counter, OrderedDict
 from datetime import datetime
+from functools import partial
 from io import BytesIO
 
 from reportlab.lib.pagesizes import letter, A4
@@ -11,24 +17,97 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.lib.utils import ImageReader
 
 from app.config import get_settings
+from app.services.chart_store import get_chart
+from app.services.file_utils import iter_files
 
 logger = logging.getLogger(__name__)
 
+def _escape_short(text: str) -> str:
+    """Escape an already-truncated string for reportlab's paragraph parser"""
+    return html.escape(text, quote=False)
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+def _decode_data_uri(uri: str) -> bytes:
+    """Decode the base64 payload of a data: URI without slicing the string"""
+    comma = uri.find(',') + 1
+    return base64.b64decode(memoryview(uri.encode('ascii'))[comma:])
+
+# Per-query markup; the question and timestamp share one paragraph (one parse)
+# and standalone labels use the bold label style instead of inline tags
+_QUERY_MARKUP = "<b>Asked:</b> {timestamp}<br/><b>Question:</b> {query}"
+_ANALYSIS_TYPE_MARKUP = "<b>Analysis Type:</b> {query_type}"
+
+class _LazyImage(Image):
+    """Image whose PNG is only decoded while it is being drawn
+    
+    A plain Image holds its decoded bytes from story assembly until
+    doc.build finishes, so reports with many charts peak at every image at once.
+    """
+    
+    def __init__(self, load_png: Callable[[], bytes], width: float, height: float):
+        # Size is fixed up front, so the base initializer's image probing is skipped
+        self.hAlign = 'CENTER'
+        self._mask = 'auto'
+        self._drawing = None
+        self._file = None
+        self._load_png = load_png
+        self.filename = repr(load_png)
+        self.drawWidth = width
+        self.drawHeight = height
+    
+    def draw(self):
+        try:
+            image = ImageReader(BytesIO(self._load_png()))
+        except Exception as e:
+            # Leave a blank slot rather than failing the whole report
+            logger.warning(f"Could not add chart to PDF: {str(e)}")
+            return
+        
+        self.canv.drawImage(
+            image,
+            getattr(self, '_offs_x', 0),
+            getattr(self, '_offs_y', 0),
+            self.drawWidth,
+            self.drawHeight,
+            mask=self._mask
+        )
+
 class ExportService:
     """Service for exporting query results and conversations to PDF reports"""
     
     def __init__(self):
         self.settings = get_settings()
         self.export_dir = "./exports"
-        self.session_data = {}  # Store session data for export
+        # Session data for export, least recently active first
+        self.session_data: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._chart_dir = os.path.join(self.export_dir, "_charts")
+        # Kept up to date as reports are written and removed, so health checks
+        # don't rescan the export directory
+        self._report_count: Optional[int] = None
+        self._export_writable = False
+        # Report styles are constants, built once and shared by every report
+        self._styles = None
+        self._title_style = None
+        self._heading_style = None
+        self._label_style = None
+        self._session_table_style = None
         
     async def initialize(self):
         """Initialize the export service"""
         try:
             # Create export directory
             os.makedirs(self.export_dir, exist_ok=True)
+            os.makedirs(self._chart_dir, exist_ok=True)
+            self._export_writable = os.access(self.export_dir, os.W_OK)
+            self._report_count = len(await self.list_exported_reports())
+            
+            self._build_styles()
             
             logger.info("Export service initialized successfully")
             
@@ -36,24 +115,120 @@ class ExportService:
             logger.error(f"Error initializing export service: {str(e)}")
             raise
     
+    def _build_styles(self):
+        """Build the stylesheet and custom styles used by every report"""
+        self._styles = getSampleStyleSheet()
+        
+        self._title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=self._styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            textColor=colors.darkblue
+        )
+        
+        self._heading_style = ParagraphStyle(
+            'CustomHeading',
+            parent=self._styles['Heading2'],
+            fontSize=16,
+            spaceAfter=12,
+            spaceBefore=20,
+            textColor=colors.darkblue
+        )
+        
+        self._label_style = ParagraphStyle(
+            'Label',
+            parent=self._styles['Normal'],
+            fontName='Helvetica-Bold'
+        )
+        
+        self._session_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ])
+    
     async def store_session_data(self, session_id: str, query: str, response: Dict[str, Any]):
         """Store session data for later export"""
         try:
+            self._evict_expired()
+            
             if session_id not in self.session_data:
                 self.session_data[session_id] = {
                     "created_at": datetime.now(),
-                    "queries": []
+                    "queries": [],
+                    "chart_paths": []
                 }
             
-            self.session_data[session_id]["queries"].append({
+            session = self.session_data[session_id]
+            session["last_active"] = time.monotonic()
+            self.session_data.move_to_end(session_id)
+            
+            session["queries"].append({
                 "timestamp": datetime.now(),
                 "query": query,
-                "response": response
+                "response": self._normalize_charts(response, session["chart_paths"])
             })
             
+            while len(self.session_data) > self.settings.EXPORT_MAX_SESSIONS:
+                self._drop_session(next(iter(self.session_data)))
+            
         except Exception as e:
             logger.error(f"Error storing session data: {str(e)}")
     
+    def _normalize_charts(self, response: Dict[str, Any], chart_paths: List[str]) -> Dict[str, Any]:
+        """Keep chart images in session data as raw PNG rather than base64 text
+        
+        Charts from the chart store keep a reference to their PNG bytes, so
+        reports still render after the store evicts them. Inline data: URIs are
+        decoded once here and spilled to disk, keeping only their paths.
+        """
+        charts = response.get('charts')
+        if not charts:
+            return response
+        
+        normalized = []
+        for chart in charts:
+            png_bytes = get_chart(chart['id']) if chart.get('id') else None
+            if png_bytes is not None:
+                chart = {key: value for key, value in chart.items() if key != 'image'}
+                chart['_png'] = png_bytes
+            elif chart.get('image'):
+                os.makedirs(self._chart_dir, exist_ok=True)
+                path = os.path.join(self._chart_dir, f"{uuid.uuid4().hex}.png")
+                with open(path, 'wb') as f:
+                    f.write(_decode_data_uri(chart['image']))
+                chart_paths.append(path)
+                chart = {key: value for key, value in chart.items() if key != 'image'}
+                chart['image_path'] = path
+            normalized.append(chart)
+        
+        return {**response, 'charts': normalized}
+    
+    def _evict_expired(self):
+        """Drop sessions idle for longer than the TTL"""
+        cutoff = time.monotonic() - self.settings.EXPORT_SESSION_TTL
+        while self.session_data:
+            session_id, session = next(iter(self.session_data.items()))
+            if session["last_active"] >= cutoff:
+                break
+            self._drop_session(session_id)
+    
+    def _drop_session(self, session_id: str):
+        """Forget a session along with its spilled chart files"""
+        session = self.session_data.pop(session_id, None)
+        if session is None:
+            return
+        for path in session["chart_paths"]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
     async def generate_pdf_report(self, session_id: str) -> str:
         """Generate a comprehensive PDF report for a session"""
         try:
@@ -61,173 +236,188 @@ class ExportService:
                 raise ValueError(f"No data found for session {session_id}")
             
             session_info = self.session_data[session_id]
+            filepath = self._report_path(session_id)
             
-            # Create PDF filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"autoanalyst_report_{session_id[:8]}_{timestamp}.pdf"
-            filepath = os.path.join(self.export_dir, filename)
-            
-            # Create PDF document
-            doc = SimpleDocTemplate(
-                filepath,
-                pagesize=A4,
-                rightMargin=72,
-                leftMargin=72,
-                topMargin=72,
-                bottomMargin=18
-            )
-            
-            # Build PDF content
-            story = []
-            styles = getSampleStyleSheet()
-            
-            # Add custom styles
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                spaceAfter=30,
-                alignment=TA_CENTER,
-                textColor=colors.darkblue
-            )
-            
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading2'],
-                fontSize=16,
-                spaceAfter=12,
-                spaceBefore=20,
-                textColor=colors.darkblue
-            )
-            
-            # Title page
-            story.append(Paragraph("AutoAnalyst AI Report", title_style))
-            story.append(Spacer(1, 20))
-            
-            # Session info
-            session_info_data = [
-                ["Session ID:", session_id],
-                ["Generated:", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
-                ["Session Created:", session_info["created_at"].strftime("%Y-%m-%d %H:%M:%S")],
-                ["Total Queries:", str(len(session_info["queries"]))]
-            ]
+            # Layout and chart decoding are CPU-bound, so build the PDF in a
+            # worker thread; the story is assembled here, on the loop
+            story = self._build_story(session_id, session_info)
+            await asyncio.to_thread(self._render, story, filepath)
+            self._count_reports(1)
             
-            session_table = Table(session_info_data, colWidths=[2*inch, 4*inch])
-            session_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            story.append(session_table)
-            story.append(Spacer(1, 30))
-            
-            # Executive Summary
-            story.append(Paragraph("Executive Summary", heading_style))
-            
-            # Generate summary based on query types
-            summary = self._generate_executive_summary(session_info["queries"])
-            story.append(Paragraph(summary, styles['Normal']))
-            story.append(Spacer(1, 20))
-            
-            # Query Details
-            story.append(Paragraph("Query Analysis Details", heading_style))
-            
-            for i, query_data in enumerate(session_info["queries"], 1):
-                # Query section
-                story.append(Paragraph(f"Query #{i}", styles['Heading3']))
-                story.append(Paragraph(f"<b>Asked:</b> {query_data['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
-                story.append(Paragraph(f"<b>Question:</b> {query_data['query']}", styles['Normal']))
-                story.append(Spacer(1, 10))
-                
-                response = query_data['response']
-                
-                # Answer
-                story.append(Paragraph("<b>Answer:</b>", styles['Normal']))
-                answer_text = self._clean_text_for_pdf(response.get('answer', 'No answer provided'))
-                story.append(Paragraph(answer_text, styles['Normal']))
-                story.append(Spacer(1, 10))
-                
-                # Query type and tools used
-                query_type = response.get('query_type', 'general')
-                story.append(Paragraph(f"<b>Analysis Type:</b> {query_type.title()}", styles['Normal']))
-                
-                # Sources
-                sources = response.get('sources', [])
-                if sources:
-                    story.append(Paragraph("<b>Sources:</b>", styles['Normal']))
-                    for j, source in enumerate(sources[:5], 1):  # Limit to 5 sources
-                        if isinstance(source, dict):
-                            source_text = source.get('content', source.get('snippet', 'No content'))
-                            source_name = source.get('source', source.get('title', f'Source {j}'))
-                            story.append(Paragraph(f"{j}. <i>{source_name}</i>: {self._clean_text_for_pdf(source_text[:200])}...", styles['Normal']))
-                
-                # Charts
-                charts = response.get('charts', [])
-                if charts:
-                    story.append(Paragraph("<b>Visualizations:</b>", styles['Normal']))
-                    for chart in charts:
-                        if 'image' in chart and chart['image']:
-                            # Add chart image
-                            try:
-                                image_data = chart['image'].split(',')[1]  # Remove data:image/png;base64,
-                                image_bytes = base64.b64decode(image_data)
-                                
-                                img = Image(BytesIO(image_bytes))
-                                img.drawHeight = 3*inch
-                                img.drawWidth = 5*inch
-                                
-                                story.append(img)
-                                story.append(Paragraph(f"Chart: {chart.get('title', 'Visualization')}", styles['Caption']))
-                            except Exception as e:
-                                logger.warning(f"Could not add chart to PDF: {str(e)}")
-                                story.append(Paragraph(f"Chart: {chart.get('title', 'Visualization')} (Image could not be embedded)", styles['Normal']))
-                
-                story.append(Spacer(1, 20))
-            
-            # Build PDF
-            doc.build(story)
-            
-            logger.info(f"Generated PDF report: {filename}")
+            logger.info(f"Generated PDF report: {os.path.basename(filepath)}")
             return filepath
             
         except Exception as e:
             logger.error(f"Error generating PDF report: {str(e)}")
             raise
     
+    def _count_reports(self, delta: int):
+        if self._report_count is not None:
+            self._report_count = max(0, self._report_count + delta)
+    
+    def _report_path(self, session_id: str) -> str:
+        """Path for a new report file"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"autoanalyst_report_{session_id[:8]}_{timestamp}.pdf"
+        return os.path.join(self.export_dir, filename)
+    
+    def _render(self, story: List[Any], filepath: str):
+        """Lay out and write a story as a PDF (blocking)"""
+        doc = SimpleDocTemplate(
+            filepath,
+            pagesize=A4,
+            rightMargin=72,
+            leftMargin=72,
+            topMargin=72,
+            bottomMargin=18
+        )
+        doc.build(story)
+    
+    def _ensure_styles(self):
+        if self._styles is None:
+            self._build_styles()
+    
+    def _build_story(self, session_id: str, session_info: Dict[str, Any]) -> List[Any]:
+        """Flowables for a full session report"""
+        self._ensure_styles()
+        styles = self._styles
+        heading_style = self._heading_style
+        story = []
+        
+        # Title page
+        story.append(Paragraph("AutoAnalyst AI Report", self._title_style))
+        story.append(Spacer(1, 20))
+        
+        # Session info
+        session_info_data = [
+            ["Session ID:", session_id],
+            ["Generated:", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
+            ["Session Created:", session_info["created_at"].strftime("%Y-%m-%d %H:%M:%S")],
+            ["Total Queries:", str(len(session_info["queries"]))]
+        ]
+        
+        session_table = Table(session_info_data, colWidths=[2*inch, 4*inch])
+        session_table.setStyle(self._session_table_style)
+        
+        story.append(session_table)
+        story.append(Spacer(1, 30))
+        
+        # Executive Summary
+        story.append(Paragraph("Executive Summary", heading_style))
+        
+        # Generate summary based on query types
+        summary = self._generate_executive_summary(session_info["queries"])
+        story.append(Paragraph(summary, styles['Normal']))
+        story.append(Spacer(1, 20))
+        
+        # Query Details
+        story.append(Paragraph("Query Analysis Details", heading_style))
+        
+        for i, query_data in enumerate(session_info["queries"], 1):
+            story.append(Paragraph(f"Query #{i}", styles['Heading3']))
+            self._append_query(story, query_data['query'], query_data['response'], query_data['timestamp'])
+        
+        return story
+    
+    def _build_single_query_story(self, query: str, response: Dict[str, Any], timestamp: datetime) -> List[Any]:
+        """Flowables for a one-query report, without the session table and summary"""
+        self._ensure_styles()
+        story = [
+            Paragraph("AutoAnalyst AI Report", self._title_style),
+            Spacer(1, 20)
+        ]
+        self._append_query(story, query, response, timestamp)
+        return story
+    
+    def _append_query(self, story: List[Any], query: str, response: Dict[str, Any], timestamp: datetime):
+        """Add one query's question, answer, sources and charts to a story"""
+        normal = self._styles['Normal']
+        label = self._label_style
+        
+        # Query section, answer, and query type
+        story.extend([
+            Paragraph(_QUERY_MARKUP.format_map({
+                "timestamp": timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+                "query": query
+            }), normal),
+            Spacer(1, 10),
+            Paragraph("Answer:", label),
+            Paragraph(self._clean_text_for_pdf(response.get('answer', 'No answer provided')), normal),
+            Spacer(1, 10),
+            Paragraph(_ANALYSIS_TYPE_MARKUP.format_map({
+                "query_type": response.get('query_type', 'general').title()
+            }), normal)
+        ])
+        
+        # Sources
+        sources = response.get('sources', [])
+        if sources:
+            story.append(Paragraph("Sources:", label))
+            for j, source in enumerate(sources[:5], 1):  # Limit to 5 sources
+                if isinstance(source, dict):
+                    source_text = source.get('content') or source.get('snippet')
+                    if not source_text:
+                        continue
+                    source_name = source.get('source', source.get('title', f'Source {j}'))
+                    story.append(Paragraph(f"{j}. <i>{source_name}</i>: {_escape_short(str(source_text)[:200])}...", normal))
+        
+        # Charts
+        charts = response.get('charts', [])
+        if charts:
+            story.append(Paragraph("Visualizations:", label))
+            caption = self._styles['Italic']
+            for chart in charts:
+                # Prefer raw PNG bytes; fall back to a spilled file or an inline data: URI
+                png_bytes = chart.get('_png')
+                if png_bytes is None and chart.get('id'):
+                    png_bytes = get_chart(chart['id'])
+                if png_bytes is not None:
+                    load_png = lambda png_bytes=png_bytes: png_bytes
+                elif chart.get('image_path'):
+                    load_png = partial(_read_bytes, chart['image_path'])
+                elif chart.get('image'):
+                    load_png = partial(_decode_data_uri, chart['image'])
+                else:
+                    story.append(Paragraph(f"Chart: {chart.get('title', 'Visualization')} (Image could not be embedded)", normal))
+                    continue
+                
+                story.extend([
+                    _LazyImage(load_png, 5*inch, 3*inch),
+                    Paragraph(f"Chart: {chart.get('title', 'Visualization')}", caption)
+                ])
+        
+        story.append(Spacer(1, 20))
+    
     def _generate_executive_summary(self, queries: List[Dict[str, Any]]) -> str:
         """Generate an executive summary based on the queries and responses"""
         try:
             total_queries = len(queries)
             
-            # Analyze query types
-            query_types = {}
+            # Analyze query types and count sources and charts in one pass
+            query_types = Counter()
+            total_sources = 0
+            total_charts = 0
             for query_data in queries:
-                qtype = query_data['response'].get('query_type', 'general')
-                query_types[qtype] = query_types.get(qtype, 0) + 1
-            
-            # Count sources and charts
-            total_sources = sum(len(q['response'].get('sources', [])) for q in queries)
-            total_charts = sum(len(q['response'].get('charts', [])) for q in queries)
+                response = query_data['response']
+                query_types[response.get('query_type', 'general')] += 1
+                total_sources += len(response.get('sources') or ())
+                total_charts += len(response.get('charts') or ())
             
-            summary = f"""This report contains the analysis of {total_queries} queries processed during this AutoAnalyst AI session. """
+            parts = [f"This report contains the analysis of {total_queries} queries processed during this AutoAnalyst AI session."]
             
             if query_types:
                 type_breakdown = ", ".join([f"{count} {qtype}" for qtype, count in query_types.items()])
-                summary += f"The queries included: {type_breakdown}. "
+                parts.append(f"The queries included: {type_breakdown}.")
             
             if total_sources > 0:
-                summary += f"A total of {total_sources} sources were consulted across all queries. "
+                parts.append(f"A total of {total_sources} sources were consulted across all queries.")
             
             if total_charts > 0:
-                summary += f"{total_charts} visualizations were generated to support the analysis. "
+                parts.append(f"{total_charts} visualizations were generated to support the analysis.")
             
-            summary += "This report provides a comprehensive overview of the questions asked and the intelligent responses provided by AutoAnalyst AI's multi-modal approach combining document retrieval, data analysis, and web search capabilities."
+            parts.append("This report provides a comprehensive overview of the questions asked and the intelligent responses provided by AutoAnalyst AI's multi-modal approach combining document retrieval, data analysis, and web search capabilities.")
             
-            return summary
+            return " ".join(parts)
             
         except Exception as e:
             logger.error(f"Error generating executive summary: {str(e)}")
@@ -238,33 +428,29 @@ class ExportService:
         if not text:
             return ""
         
-        # Replace problematic characters
-        text = str(text)
-        text = text.replace('&', '&amp;')
-        text = text.replace('<', '&lt;')
-        text = text.replace('>', '&gt;')
-        
-        # Limit length for readability
+        # Limit length for readability, before escaping so long answers aren't
+        # scanned in full
+        text = text if isinstance(text, str) else str(text)
         if len(text) > 1000:
             text = text[:1000] + "..."
         
-        return text
+        # Escape markup characters for reportlab's paragraph parser
+        if '&' not in text and '<' not in text and '>' not in text:
+            return text
+        return html.escape(text, quote=False)
     
     async def export_query_result(self, query: str, response: Dict[str, Any]) -> str:
         """Export a single query result to PDF"""
         try:
-            # Create a temporary session for single query export
-            temp_session_id = f"single_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            
-            await self.store_session_data(temp_session_id, query, response)
+            now = datetime.now()
+            filepath = self._report_path(f"single_{now.strftime('%Y%m%d_%H%M%S')}")
             
-            # Generate PDF
-            filepath = await self.generate_pdf_report(temp_session_id)
-            
-            # Clean up temporary session data
-            if temp_session_id in self.session_data:
-                del self.session_data[temp_session_id]
+            # Generate PDF straight from the query, without a temporary session
+            story = self._build_single_query_story(query, response, now)
+            await asyncio.to_thread(self._render, story, filepath)
+            self._count_reports(1)
             
+            logger.info(f"Generated PDF report: {os.path.basename(filepath)}")
             return filepath
             
         except Exception as e:
@@ -274,20 +460,15 @@ class ExportService:
     async def list_exported_reports(self) -> List[Dict[str, Any]]:
         """List all exported PDF reports"""
         try:
-            reports = []
-            
-            if os.path.exists(self.export_dir):
-                for filename in os.listdir(self.export_dir):
-                    if filename.endswith('.pdf'):
-                        filepath = os.path.join(self.export_dir, filename)
-                        reports.append({
-                            "filename": filename,
-                            "filepath": filepath,
-                            "size": os.path.getsize(filepath),
-                            "created": datetime.fromtimestamp(
-                                os.path.getctime(filepath)
-                            ).isoformat()
-                        })
+            reports = [
+                {
+                    "filename": filename,
+                    "filepath": filepath,
+                    "size": stat.st_size,
+                    "created": datetime.fromtimestamp(stat.st_ctime).isoformat()
+                }
+                for filename, filepath, stat in iter_files(self.export_dir, '.pdf')
+            ]
             
             # Sort by creation time (newest first)
             reports.sort(key=lambda x: x["created"], reverse=True)
@@ -305,6 +486,7 @@ class ExportService:
             
             if os.path.exists(filepath) and filename.endswith('.pdf'):
                 os.remove(filepath)
+                self._count_reports(-1)
                 logger.info(f"Deleted report: {filename}")
                 return True
             
@@ -320,14 +502,12 @@ class ExportService:
             cutoff_time = datetime.now().timestamp() - (days_old * 24 * 60 * 60)
             deleted_count = 0
             
-            if os.path.exists(self.export_dir):
-                for filename in os.listdir(self.export_dir):
-                    if filename.endswith('.pdf'):
-                        filepath = os.path.join(self.export_dir, filename)
-                        if os.path.getctime(filepath) < cutoff_time:
-                            os.remove(filepath)
-                            deleted_count += 1
+            for _, filepath, stat in iter_files(self.export_dir, '.pdf'):
+                if stat.st_ctime < cutoff_time:
+                    os.remove(filepath)
+                    deleted_count += 1
             
+            self._count_reports(-deleted_count)
             logger.info(f"Cleaned up {deleted_count} old reports")
             return deleted_count
             
@@ -338,12 +518,15 @@ class ExportService:
     async def health_check(self) -> Dict[str, Any]:
         """Check health of the export service"""
         try:
+            if self._report_count is None:
+                self._report_count = len(await self.list_exported_reports())
+            
             return {
                 "status": "healthy",
                 "export_directory_exists": os.path.exists(self.export_dir),
-                "export_directory_writable": os.access(self.export_dir, os.W_OK),
+                "export_directory_writable": self._export_writable,
                 "active_sessions": len(self.session_data),
-                "available_reports": len(await self.list_exported_reports())
+                "available_reports": self._report_count
             }
             
         except Exception as e:
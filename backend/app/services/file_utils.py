@@ -0,0 +1,17 @@
+from typing import Iterator, Optional, Tuple
+import os
+
+def iter_files(directory: str, suffix: Optional[str] = None) -> Iterator[Tuple[str, str, os.stat_result]]:
+    """Yield (name, path, stat) for each file in a directory, stat'ing each once (blocking)
+    
+    A missing directory yields nothing.
+    """
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if suffix is not None and not entry.name.endswith(suffix):
+                    continue
+                if entry.is_file():
+                    yield entry.name, entry.path, entry.stat()
+    except FileNotFoundError:
+        return
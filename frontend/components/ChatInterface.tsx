@@ -138,9 +138,9 @@ export default function ChatInterface({ messages, isLoading, onSendMessage, onEx
           {chart.title}
         </h3>
         <div className="flex justify-center">
-          {chart.base64 ? (
+          {chart.image_url || chart.base64 ? (
             <img 
-              src={`data:image/png;base64,${chart.base64}`} 
+              src={chart.image_url ? chart.image_url : `data:image/png;base64,${chart.base64}`} 
               alt={chart.title} 
               className="max-w-full rounded shadow-lg"
             />
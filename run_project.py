@@ -2,22 +2,39 @@
 
 import os
 import sys
+import hashlib
+import shutil
 import subprocess
+import tarfile
 import platform
-import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=1)
+def _env_has_placeholder(path_str, mtime):
+    """Check an env file for the placeholder API key (memoized on path and mtime)"""
+    with open(path_str, 'r') as f:
+        # Stop reading at the first placeholder line
+        return any("your_openai_api_key_here" in line for line in f)
+
 class AutoAnalystRunner:
     def __init__(self):
         self.root_dir = Path(__file__).parent
         self.backend_dir = self.root_dir / "backend"
         self.frontend_dir = self.root_dir / "frontend"
         
+        # Resolve venv executables once; every install and launch step uses them
+        self.is_windows = platform.system() == "Windows"
+        self.venv_bin = self.backend_dir / "venv" / ("Scripts" if self.is_windows else "bin")
+        self.pip_path = self.venv_bin / ("pip.exe" if self.is_windows else "pip")
+        self.python_path = self.venv_bin / ("python.exe" if self.is_windows else "python")
+        
     def check_python(self):
         """Check if Python 3.8+ is available"""
         try:
@@ -31,10 +48,21 @@ class AutoAnalystRunner:
             logger.error(f"Error checking Python version: {e}")
             return False
     
+    def check_prerequisites(self):
+        """Run the independent prerequisite checks concurrently
+        
+        Returns (python_ok, node_ok).
+        """
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            python_check = executor.submit(self.check_python)
+            node_check = executor.submit(self.check_node)
+            return python_check.result(), node_check.result()
+    
     def check_node(self):
         """Check if Node.js is available"""
         try:
-            result = subprocess.run(["node", "--version"], capture_output=True, text=True)
+            # A hung node install shouldn't stall startup
+            result = subprocess.run(["node", "--version"], capture_output=True, text=True, timeout=2)
             if result.returncode == 0:
                 logger.info(f"Node.js {result.stdout.strip()} detected")
                 return True
@@ -44,6 +72,9 @@ class AutoAnalystRunner:
         except FileNotFoundError:
             logger.warning("Node.js not found - frontend features will be limited")
             return False
+        except subprocess.TimeoutExpired:
+            logger.warning("node --version timed out - frontend features will be limited")
+            return False
     
     def create_venv(self):
         """Create virtual environment for backend"""
@@ -53,49 +84,175 @@ class AutoAnalystRunner:
             logger.info("Virtual environment already exists")
             return True
         
+        if self.restore_venv_template(venv_path):
+            return True
+        
         try:
             logger.info("Creating virtual environment...")
-            subprocess.run([sys.executable, "-m", "venv", str(venv_path)], check=True)
+            uv_path = self.get_uv_path()
+            if uv_path:
+                # uv seeds the venv itself, skipping the slow ensurepip bootstrap
+                subprocess.run([uv_path, "venv", "--python", sys.executable, str(venv_path)], check=True)
+            else:
+                subprocess.run([sys.executable, "-m", "venv", str(venv_path)], check=True)
+                # Snapshot the fresh venv so a recreate can skip ensurepip
+                self.save_venv_template(venv_path)
             logger.info("Virtual environment created successfully")
             return True
         except subprocess.CalledProcessError as e:
             logger.error(f"Failed to create virtual environment: {e}")
             return False
     
+    def get_venv_template_path(self):
+        """Get the snapshot of a fresh venv for this interpreter and location
+        
+        Venvs hard-code their own path and base interpreter, so the snapshot is
+        keyed on both and only ever restored to the same place.
+        """
+        venv_path = self.backend_dir / "venv"
+        key = hashlib.sha256(f"{sys.executable}|{venv_path.resolve()}".encode()).hexdigest()[:12]
+        return self.root_dir / f".venv_template-{key}.tar"
+    
+    def save_venv_template(self, venv_path):
+        """Snapshot a freshly created venv"""
+        try:
+            with tarfile.open(self.get_venv_template_path(), "w") as tar:
+                tar.add(venv_path, arcname=venv_path.name)
+        except (OSError, tarfile.TarError) as e:
+            logger.warning(f"Could not save virtual environment template: {e}")
+    
+    def restore_venv_template(self, venv_path):
+        """Recreate the venv from its snapshot, if there is one"""
+        template = self.get_venv_template_path()
+        if not template.exists():
+            return False
+        
+        try:
+            with tarfile.open(template) as tar:
+                # The snapshot is our own, but keep newer Pythons' extraction checks
+                if hasattr(tarfile, "tar_filter"):
+                    tar.extractall(self.backend_dir, filter="tar")
+                else:
+                    tar.extractall(self.backend_dir)
+        except (OSError, tarfile.TarError) as e:
+            logger.warning(f"Could not restore virtual environment template: {e}")
+            shutil.rmtree(venv_path, ignore_errors=True)
+            return False
+        
+        logger.info("Virtual environment restored from template")
+        return True
+    
+    def get_uv_path(self):
+        """Get the uv executable path, or None if uv isn't installed"""
+        return shutil.which("uv")
+    
     def get_pip_path(self):
         """Get pip executable path"""
-        if platform.system() == "Windows":
-            return self.backend_dir / "venv" / "Scripts" / "pip.exe"
-        else:
-            return self.backend_dir / "venv" / "bin" / "pip"
+        return self.pip_path
     
     def get_python_path(self):
         """Get Python executable path"""
-        if platform.system() == "Windows":
-            return self.backend_dir / "venv" / "Scripts" / "python.exe"
+        return self.python_path
+    
+    def start_backend_install(self):
+        """Start installing backend Python dependencies, returning the install process"""
+        pip_path = self.get_pip_path()
+        requirements_path = self.backend_dir / "requirements.txt"
+        
+        if not requirements_path.exists():
+            logger.error("requirements.txt not found")
+            return None
+        
+        logger.info("Installing backend dependencies...")
+        uv_path = self.get_uv_path()
+        if uv_path:
+            # uv resolves and downloads in parallel, much faster than pip
+            command = [
+                uv_path, "pip", "install", "--python", str(self.get_python_path()),
+                "-r", str(requirements_path)
+            ]
         else:
-            return self.backend_dir / "venv" / "bin" / "python"
+            command = [str(pip_path), "install", "-r", str(requirements_path)]
+        
+        try:
+            return subprocess.Popen(command, cwd=self.backend_dir)
+        except OSError as e:
+            logger.error(f"Failed to install backend dependencies: {e}")
+            return None
     
     def install_backend_dependencies(self):
         """Install backend Python dependencies"""
-        try:
-            pip_path = self.get_pip_path()
-            requirements_path = self.backend_dir / "requirements.txt"
-            
-            if not requirements_path.exists():
-                logger.error("requirements.txt not found")
-                return False
-            
-            logger.info("Installing backend dependencies...")
-            subprocess.run([
-                str(pip_path), "install", "-r", str(requirements_path)
-            ], check=True, cwd=self.backend_dir)
-            
-            logger.info("Backend dependencies installed successfully")
+        if self.backend_dependencies_current():
             return True
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to install backend dependencies: {e}")
+        return self.finish_backend_install(self.start_backend_install())
+    
+    def finish_backend_install(self, process):
+        """Wait for the backend install and record what was installed"""
+        if not self.wait_for_install(process, "Backend"):
+            return False
+        
+        try:
+            self.get_requirements_stamp_path().write_text(self.get_requirements_hash())
+        except OSError as e:
+            logger.warning(f"Could not record installed requirements: {e}")
+        return True
+    
+    def get_requirements_stamp_path(self):
+        """Get the file recording the requirements last installed into the venv"""
+        return self.backend_dir / "venv" / ".requirements.sha256"
+    
+    def get_requirements_hash(self):
+        """Hash requirements.txt together with the Python version it was installed for"""
+        digest = hashlib.sha256((self.backend_dir / "requirements.txt").read_bytes())
+        digest.update(repr(tuple(sys.version_info)).encode())
+        return digest.hexdigest()
+    
+    def backend_dependencies_current(self):
+        """Check whether requirements.txt is unchanged since the last successful install"""
+        try:
+            current = self.get_requirements_stamp_path().read_text() == self.get_requirements_hash()
+        except OSError:
+            return False
+        
+        if current:
+            logger.info("Backend dependencies up to date (cached)")
+        return current
+    
+    def wait_for_install(self, process, name):
+        """Wait for an install process and report how it went"""
+        if process is None:
+            return False
+        
+        if process.wait() != 0:
+            logger.error(f"Failed to install {name.lower()} dependencies: exit code {process.returncode}")
+            return False
+        
+        logger.info(f"{name} dependencies installed successfully")
+        return True
+    
+    def install_dependencies(self, node_available=None):
+        """Install backend and frontend dependencies concurrently
+        
+        The two installs touch separate directories and toolchains, so running
+        them side by side roughly halves first-run setup time. Only a backend
+        failure is fatal.
+        """
+        backend_current = self.backend_dependencies_current()
+        backend_process = None if backend_current else self.start_backend_install()
+        frontend_process = self.start_frontend_install(node_available)
+        
+        backend_ok = backend_current or self.finish_backend_install(backend_process)
+        if frontend_process is not None:
+            self.wait_for_install(frontend_process, "Frontend")
+        return backend_ok
+    
+    def env_has_placeholder(self, env_file):
+        """Check whether the env file still holds the placeholder API key"""
+        try:
+            mtime = env_file.stat().st_mtime
+        except OSError:
             return False
+        return _env_has_placeholder(str(env_file), mtime)
     
     def setup_environment(self):
         """Setup environment variables"""
@@ -109,9 +266,7 @@ class AutoAnalystRunner:
         if env_example.exists():
             try:
                 # Copy example to .env
-                with open(env_example, 'r') as src, open(env_file, 'w') as dst:
-                    content = src.read()
-                    dst.write(content)
+                shutil.copyfile(env_example, env_file)
                 
                 logger.info("Environment file created from example")
                 logger.warning("Please edit .env file and add your OpenAI API key!")
@@ -155,24 +310,33 @@ PORT=8000
             
             # Check if .env has OpenAI API key
             env_file = self.backend_dir / ".env"
-            if env_file.exists():
-                with open(env_file, 'r') as f:
-                    content = f.read()
-                    if "your_openai_api_key_here" in content:
-                        logger.error("Please set your OpenAI API key in the .env file!")
-                        logger.info("Edit backend/.env and replace 'your_openai_api_key_here' with your actual API key")
-                        return False
+            if self.env_has_placeholder(env_file):
+                logger.error("Please set your OpenAI API key in the .env file!")
+                logger.info("Edit backend/.env and replace 'your_openai_api_key_here' with your actual API key")
+                return False
             
             logger.info("Starting AutoAnalyst AI backend...")
             logger.info("Backend will be available at: http://localhost:8000")
             logger.info("API documentation: http://localhost:8000/docs")
             
-            # Start the backend server
-            os.chdir(self.backend_dir)
-            subprocess.run([
-                str(python_path), "-m", "uvicorn", "app.main:app", 
-                "--reload", "--host", "0.0.0.0", "--port", "8000"
-            ], check=True)
+            # Start the backend server on uvloop + httptools (uvloop isn't available on Windows)
+            command = [
+                str(python_path), "-m", "uvicorn", "app.main:app",
+                "--host", "0.0.0.0", "--port", "8000",
+                "--loop", "asyncio" if self.is_windows else "uvloop",
+                "--http", "httptools",
+                "--no-access-log"
+            ]
+            # The reload supervisor costs throughput, so only use it while developing;
+            # it can't be combined with multiple workers
+            if os.getenv("AUTOANALYST_DEV") == "1":
+                command.append("--reload")
+            else:
+                workers = self.get_worker_count()
+                if workers > 1:
+                    logger.info(f"Starting {workers} worker processes")
+                    command += ["--workers", str(workers)]
+            subprocess.run(command, check=True, cwd=str(self.backend_dir))
             
         except subprocess.CalledProcessError as e:
             logger.error(f"Failed to start backend: {e}")
@@ -181,24 +345,49 @@ PORT=8000
             logger.info("Backend server stopped")
             return True
     
-    def install_frontend_dependencies(self):
-        """Install frontend dependencies"""
-        if not self.check_node():
-            return False
+    def start_frontend_install(self, node_available=None):
+        """Start installing frontend dependencies, returning the install process"""
+        if node_available is None:
+            node_available = self.check_node()
+        if not node_available:
+            return None
         
         package_json = self.frontend_dir / "package.json"
         if not package_json.exists():
             logger.warning("package.json not found - skipping frontend setup")
-            return False
+            return None
         
         try:
             logger.info("Installing frontend dependencies...")
-            subprocess.run(["npm", "install"], check=True, cwd=self.frontend_dir)
-            logger.info("Frontend dependencies installed successfully")
-            return True
-        except subprocess.CalledProcessError as e:
+            return subprocess.Popen(["npm", "install"], cwd=self.frontend_dir)
+        except OSError as e:
             logger.error(f"Failed to install frontend dependencies: {e}")
-            return False
+            return None
+    
+    def get_worker_count(self):
+        """Get the number of uvicorn worker processes
+        
+        Set with --workers N (or AUTOANALYST_WORKERS); "auto" uses 2 * cores + 1.
+        Defaults to 1 because the vector index, chart store and export sessions
+        live in process memory and aren't shared between workers.
+        """
+        value = os.getenv("AUTOANALYST_WORKERS", "1")
+        if "--workers" in sys.argv:
+            index = sys.argv.index("--workers")
+            if index + 1 < len(sys.argv):
+                value = sys.argv[index + 1]
+        
+        if value == "auto":
+            return max(2, (os.cpu_count() or 1) * 2 + 1)
+        try:
+            return max(1, int(value))
+        except ValueError:
+            logger.warning(f"Invalid worker count '{value}' - using 1")
+            return 1
+    
+    def install_frontend_dependencies(self):
+        """Install frontend dependencies"""
+        return self.wait_for_install(self.start_frontend_install(), "Frontend")
     
     def show_usage_instructions(self):
         """Show usage instructions"""
@@ -244,14 +433,15 @@ For more help, see the README.md file.
         logger.info("🚀 Starting AutoAnalyst AI Setup...")
         
         # Check prerequisites
-        if not self.check_python():
+        python_ok, node_ok = self.check_prerequisites()
+        if not python_ok:
             return False
         
         # Setup backend
         if not self.create_venv():
             return False
         
-        if not self.install_backend_dependencies():
+        if not self.install_dependencies(node_ok):
             return False
         
         if not self.setup_environment():
@@ -259,13 +449,10 @@ For more help, see the README.md file.
         
         # Check if this is first-time setup
         env_file = self.backend_dir / ".env"
-        if env_file.exists():
-            with open(env_file, 'r') as f:
-                content = f.read()
-                if "your_openai_api_key_here" in content:
-                    logger.info("✅ Setup completed!")
-                    self.show_usage_instructions()
-                    return True
+        if self.env_has_placeholder(env_file):
+            logger.info("✅ Setup completed!")
+            self.show_usage_instructions()
+            return True
         
         # Run the backend
         return self.run_backend()
@@ -278,7 +465,7 @@ def main():
         # Just do setup, don't run server
         runner.check_python()
         runner.create_venv()
-        runner.install_backend_dependencies()
+        runner.install_dependencies()
         runner.setup_environment()
         runner.show_usage_instructions()
     else:
@@ -1,135 +1,198 @@
 #!/usr/bin/env python3
 
-import requests
+import asyncio
+import httpx
 import json
-import time
 import sys
-from typing import Dict, Any
+import time
+from typing import Dict, Any, List, Optional
+
+# orjson is optional; faster JSON encoding and parsing when installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps(payload: Any) -> bytes:
+    """Serialize a request payload to JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode()
+
+def loads(content: bytes) -> Any:
+    """Parse a JSON response body"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+class RateLimiter:
+    """Spaces out request starts to a steady rate, so only bursts wait"""
+    
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self.next_slot = 0.0
+    
+    async def acquire(self):
+        """Wait for the next free slot"""
+        now = time.monotonic()
+        slot = max(now, self.next_slot)
+        self.next_slot = slot + self.interval
+        await asyncio.sleep(slot - now)
 
 class AutoAnalystDemo:
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(self, base_url: str = "http://localhost:8000", concurrency: int = 3, rate: float = 3):
         self.base_url = base_url
         self.session_id = "demo_session_001"
+        self.concurrency = concurrency  # Requests in flight at once, to be nice to the API
+        self.rate_limiter = RateLimiter(rate)  # Requests started per second
     
-    def test_connection(self) -> bool:
+    def create_client(self) -> httpx.AsyncClient:
+        """Create an HTTP client for the AutoAnalyst API
+        
+        One client serves every request in a run, so connections are kept
+        alive and reused instead of opened per call.
+        """
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=60,
+            limits=httpx.Limits(max_keepalive_connections=4, max_connections=8)
+        )
+    
+    async def test_connection(self, client: httpx.AsyncClient) -> bool:
         """Test if the AutoAnalyst API is running"""
         try:
-            response = requests.get(f"{self.base_url}/")
+            response = await client.get("/")
             if response.status_code == 200:
                 print("✅ AutoAnalyst AI is running!")
                 return True
             else:
                 print(f"❌ Server returned status code: {response.status_code}")
                 return False
-        except requests.exceptions.ConnectionError:
+        except httpx.ConnectError:
             print("❌ Cannot connect to AutoAnalyst AI. Make sure the server is running at http://localhost:8000")
             return False
         except Exception as e:
             print(f"❌ Error connecting to server: {e}")
             return False
     
-    def ask_question(self, query: str) -> Dict[str, Any]:
+    async def ask_question(
+        self,
+        client: httpx.AsyncClient,
+        query: str,
+        semaphore: Optional[asyncio.Semaphore] = None
+    ) -> Dict[str, Any]:
         """Send a question to AutoAnalyst AI"""
+        # Questions run concurrently, so each one's output is printed as one block
+        lines = [f"\n🤔 Asking: {query}"]
         try:
-            print(f"\n🤔 Asking: {query}")
-            
-            response = requests.post(
-                f"{self.base_url}/api/ask",
-                json={
-                    "query": query,
-                    "session_id": self.session_id
-                },
-                timeout=60
-            )
+            async with semaphore or asyncio.Semaphore(1):
+                await self.rate_limiter.acquire()
+                response = await client.post(
+                    "/api/ask",
+                    content=dumps({
+                        "query": query,
+                        "session_id": self.session_id
+                    }),
+                    headers={"Content-Type": "application/json"}
+                )
             
             if response.status_code == 200:
-                result = response.json()
-                print(f"🤖 Response: {result['answer'][:200]}...")
+                result = loads(response.content)
+                lines.append(f"🤖 Response: {result['answer'][:200]}...")
                 
                 if result.get('sources'):
-                    print(f"📚 Sources found: {len(result['sources'])}")
+                    lines.append(f"📚 Sources found: {len(result['sources'])}")
                 
                 if result.get('charts'):
-                    print(f"📊 Charts generated: {len(result['charts'])}")
+                    lines.append(f"📊 Charts generated: {len(result['charts'])}")
                 
-                print(f"🔍 Query type: {result.get('query_type', 'unknown')}")
+                lines.append(f"🔍 Query type: {result.get('query_type', 'unknown')}")
                 return result
             else:
-                print(f"❌ Error: {response.status_code} - {response.text}")
+                lines.append(f"❌ Error: {response.status_code} - {response.text}")
                 return {}
                 
         except Exception as e:
-            print(f"❌ Error asking question: {e}")
+            lines.append(f"❌ Error asking question: {e}")
             return {}
+        finally:
+            print("\n".join(lines))
     
-    def get_health_status(self) -> Dict[str, Any]:
+    async def ask_questions(
+        self,
+        client: httpx.AsyncClient,
+        queries: List[str],
+        semaphore: asyncio.Semaphore
+    ) -> List[Dict[str, Any]]:
+        """Ask several questions concurrently"""
+        return await asyncio.gather(*(self.ask_question(client, query, semaphore) for query in queries))
+    
+    async def get_health_status(self, client: httpx.AsyncClient) -> Dict[str, Any]:
         """Get system health status"""
         try:
-            response = requests.get(f"{self.base_url}/api/health")
+            response = await client.get("/api/health")
             if response.status_code == 200:
-                return response.json()
+                return loads(response.content)
             else:
                 return {"status": "error", "message": f"HTTP {response.status_code}"}
         except Exception as e:
             return {"status": "error", "message": str(e)}
     
-    def run_demo(self):
+    async def run_demo(self):
         """Run a comprehensive demo of AutoAnalyst AI capabilities"""
         print("🚀 AutoAnalyst AI Demo Starting...")
         print("=" * 50)
         
-        # Test connection
-        if not self.test_connection():
-            print("\n💡 To start AutoAnalyst AI:")
-            print("1. Make sure you have set your OpenAI API key in backend/.env")
-            print("2. Run: python run_project.py")
-            return
-        
-        # Check health
-        print("\n📊 System Health Check:")
-        health = self.get_health_status()
-        if health.get("status") == "healthy":
-            print("✅ All services are healthy")
-        else:
-            print(f"⚠️  System status: {health}")
-        
-        print("\n" + "=" * 50)
-        print("🧪 Testing Different Query Types")
-        print("=" * 50)
-        
-        # Test SQL Analytics
-        print("\n📊 SQL Analytics Demo:")
-        sql_queries = [
-            "What are the top 5 customers by revenue?",
-            "Show me monthly sales trends",
-            "Which products have the highest profit margins?",
-        ]
-        
-        for query in sql_queries:
-            result = self.ask_question(query)
-            time.sleep(2)  # Be nice to the API
-        
-        # Test RAG (will work once documents are uploaded)
-        print("\n📚 Document Research Demo:")
-        rag_queries = [
-            "What documents are currently available?",
-            "Summarize any uploaded research papers",
-        ]
-        
-        for query in rag_queries:
-            result = self.ask_question(query)
-            time.sleep(2)
-        
-        # Test Web Search
-        print("\n🌐 Web Search Demo:")
-        web_queries = [
-            "What are the latest developments in AI transformers?",
-            "Recent trends in business analytics",
-        ]
-        
-        for query in web_queries:
-            result = self.ask_question(query)
-            time.sleep(2)
+        async with self.create_client() as client:
+            # Test connection
+            if not await self.test_connection(client):
+                print("\n💡 To start AutoAnalyst AI:")
+                print("1. Make sure you have set your OpenAI API key in backend/.env")
+                print("2. Run: python run_project.py")
+                return
+            
+            # Check health
+            print("\n📊 System Health Check:")
+            health = await self.get_health_status(client)
+            if health.get("status") == "healthy":
+                print("✅ All services are healthy")
+            else:
+                print(f"⚠️  System status: {health}")
+            
+            print("\n" + "=" * 50)
+            print("🧪 Testing Different Query Types")
+            print("=" * 50)
+            
+            # Bounds requests in flight instead of sleeping between them
+            semaphore = asyncio.Semaphore(self.concurrency)
+            
+            # Test SQL Analytics
+            print("\n📊 SQL Analytics Demo:")
+            sql_queries = [
+                "What are the top 5 customers by revenue?",
+                "Show me monthly sales trends",
+                "Which products have the highest profit margins?",
+            ]
+            
+            await self.ask_questions(client, sql_queries, semaphore)
+            
+            # Test RAG (will work once documents are uploaded)
+            print("\n📚 Document Research Demo:")
+            rag_queries = [
+                "What documents are currently available?",
+                "Summarize any uploaded research papers",
+            ]
+            
+            await self.ask_questions(client, rag_queries, semaphore)
+            
+            # Test Web Search
+            print("\n🌐 Web Search Demo:")
+            web_queries = [
+                "What are the latest developments in AI transformers?",
+                "Recent trends in business analytics",
+            ]
+            
+            await self.ask_questions(client, web_queries, semaphore)
         
         print("\n" + "=" * 50)
         print("✨ Demo Complete!")
@@ -142,6 +205,12 @@ class AutoAnalystDemo:
         print("- Request specific business metrics")
         print("- Export your conversation to PDF")
 
+async def ask_single_question(demo: AutoAnalystDemo, query: str):
+    """Ask one question if the server is reachable"""
+    async with demo.create_client() as client:
+        if await demo.test_connection(client):
+            await demo.ask_question(client, query)
+
 def main():
     """Main demo function"""
     demo = AutoAnalystDemo()
@@ -149,11 +218,10 @@ def main():
     if len(sys.argv) > 1:
         # Interactive mode - ask a single question
         query = " ".join(sys.argv[1:])
-        if demo.test_connection():
-            demo.ask_question(query)
+        asyncio.run(ask_single_question(demo, query))
     else:
         # Full demo mode
-        demo.run_demo()
+        asyncio.run(demo.run_demo())
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file